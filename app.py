@@ -5,6 +5,8 @@ from flask import Flask
 from werkzeug.middleware.proxy_fix import ProxyFix
 from aws_services import aws_services
 from models import mongodb
+from json_provider import MongoJSONProvider
+from materialization import prediction_materializer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -21,6 +23,7 @@ print("🚀 Starting AquaPulse: Smart Algae Bloom Detection and Prediction...")
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "plasticpulse-development-key-2025")
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+app.json = MongoJSONProvider(app)
 
 print("📦 Initializing AWS services...")
 
@@ -31,8 +34,17 @@ print("🗄️  Initializing database...")
 
 # Initialize sample data in MongoDB if needed
 try:
+    mongodb.ensure_indexes()
+    mongodb.backfill_sensor_geo()
     mongodb.initialize_sample_data()
+    mongodb.bootstrap_alerts()
+    mongodb.bootstrap_sensor_latest()
+    mongodb.bootstrap_report_rollups()
+    prediction_materializer.start()
     print("✅ Database initialized successfully")
+    for entry in mongodb.explain_queries():
+        if entry['collection_scan']:
+            print(f"⚠️  Query {entry['query']} on {entry['collection']} uses a collection scan")
 except Exception as e:
     print(f"⚠️  Warning: Could not initialize sample data: {e}")
 
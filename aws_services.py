@@ -6,14 +6,52 @@ import os
 import zipfile
 import io
 import random
+import copy
+import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
+from botocore.config import Config as BotoConfig
 from config import Config
+from cache import dashboard_cache, bedrock_cache
+from jobs import backup_jobs
+from forecasting import forecast_engine, trend_label, interval_confidence
+from data_lake import (BackupEngine, PrefixScanner, SensorExporter, EXPORT_PREFIX, data_type_prefix,
+                       backup_summary, new_snapshot_id, snapshot_manifest_key, empty_summary, merge_summary,
+                       media_transfer_config, as_stream, stream_digest)
+
+ANALYSIS_MODEL_ID = "anthropic.claude-3-sonnet-20240229-v1:0"
+
+ANALYSIS_PROMPT_TEMPLATE = """Analyze this harmful algae bloom data and provide a concise 5-6 line HTML response.
+
+Data: {data}
+
+Format your response exactly like this sample:
+<p><strong>🌊 Location-wise Algae Bloom Levels:</strong></p>
+<p>The <em>North Sea</em> shows the highest algae bloom level at <strong>6.8</strong>, followed by the Caribbean Sea at <strong>3.9</strong>.</p>
+<p><strong>📊 Microalgae Concentration:</strong></p>
+<p>North Sea has <strong>7,297 cells/L</strong>, Caribbean Sea has <strong>3,947 cells/L</strong>, and Atlantic Ocean has <strong>3,167 cells/L</strong>.</p>
+<p><strong>🚨 Status Alert:</strong> The North Sea is in <em>warning status</em>, requiring immediate attention.</p>
+
+Requirements:
+- Use exactly 5-6 lines with <p> tags
+- Include relevant emojis (🌊 📊 🚨 🔍 🐠)
+- Use <strong> for key numbers and <em> for emphasis
+- Focus on algae bloom levels, microalgae, and status
+- Keep it concise and actionable"""
+
+# Largest image Rekognition accepts as inline bytes
+REKOGNITION_MAX_IMAGE_BYTES = 5 * 1024 * 1024
+
+ANALYSIS_UNAVAILABLE_HTML = "<p><strong>🚨 AI Analysis Temporarily Unavailable</strong></p><p><em>Monitoring systems continue to collect data...</em></p>"
 
 class AWSServices:
     def __init__(self):
         # Initialize AWS clients with lazy loading to improve startup time
         self._session = None
         self._clients = {}
+        # Created up front (threads start lazily) so concurrent first calls share one pool
+        self._agent_pool = ThreadPoolExecutor(max_workers=Config.AGENT_MAX_WORKERS, thread_name_prefix='bedrock-agent')
     
     @property
     def session(self):
@@ -62,6 +100,14 @@ class AWSServices:
     def s3(self):
         return self.get_client('s3')
     
+    @property
+    def s3_transfer(self):
+        # S3 client with a connection pool large enough for concurrent copies and part uploads
+        if 's3-transfer' not in self._clients:
+            pool_size = max(10, Config.BACKUP_MAX_WORKERS * Config.BACKUP_PART_CONCURRENCY)
+            self._clients['s3-transfer'] = self.session.client('s3', config=BotoConfig(max_pool_connections=pool_size))
+        return self._clients['s3-transfer']
+    
     @property
     def iam(self):
         return self.get_client('iam')
@@ -73,26 +119,30 @@ class AWSServices:
     def get_iot_sensor_data(self):
         """Get IoT sensor data for harmful algae bloom monitoring from MongoDB"""
         try:
-            from models import mongodb
-            sensor_data = mongodb.get_recent_sensor_data(limit=10)
-            if sensor_data:
-                for sensor in sensor_data:
-                    if 'timestamp' not in sensor:
-                        sensor['timestamp'] = datetime.now().isoformat()
-                    if 'microalgae' not in sensor:
-                        sensor['microalgae'] = sensor.get('pollution_level', 5) * 1000
-                    if 'temperature' not in sensor:
-                        sensor['temperature'] = 20
-                    if 'turbidity' not in sensor:
-                        sensor['turbidity'] = sensor.get('pollution_level', 5) * 10
-                return sensor_data
-            else:
+            sensor_data = dashboard_cache.get_or_set('iot_sensor_data', self._load_iot_sensor_data)
+            if not sensor_data:
                 # No data in MongoDB
                 print("Error: No sensor data found in MongoDB.")
-                return []
+            # Hand out a copy so callers cannot mutate the shared cached value
+            return copy.deepcopy(sensor_data)
         except Exception as e:
             print(f"Error getting sensor data from MongoDB: {e}")
             return []
+
+    def _load_iot_sensor_data(self):
+        """Load recent sensor readings from MongoDB and fill in missing fields"""
+        from models import mongodb
+        sensor_data = mongodb.get_recent_sensor_data(limit=10)
+        for sensor in sensor_data:
+            if 'timestamp' not in sensor:
+                sensor['timestamp'] = datetime.now().isoformat()
+            if 'microalgae' not in sensor:
+                sensor['microalgae'] = sensor.get('pollution_level', 5) * 1000
+            if 'temperature' not in sensor:
+                sensor['temperature'] = 20
+            if 'turbidity' not in sensor:
+                sensor['turbidity'] = sensor.get('pollution_level', 5) * 10
+        return sensor_data
     
     def _generate_dynamic_sensor_data(self):
         """Generate dynamic sensor data with proper ID generation"""
@@ -164,60 +214,72 @@ class AWSServices:
         return sensors
     
     def invoke_bedrock_analysis(self, pollution_data):
-        """Use Bedrock for AI-powered pollution analysis"""
+        """Use Bedrock for AI-powered pollution analysis.
+
+        Responses are cached by a hash of the cleaned sensor payload and the
+        prompt template, and concurrent identical requests share one model call.
+        """
         try:
-            # Convert datetime objects and ObjectIds to strings for JSON serialization
-            clean_data = []
-            for sensor in pollution_data[:3]:
-                clean_sensor = {}
-                for k, v in sensor.items():
-                    if hasattr(v, 'isoformat'):  # datetime objects
-                        clean_sensor[k] = v.isoformat()
-                    elif hasattr(v, '__str__') and k == '_id':  # ObjectId
-                        clean_sensor[k] = str(v)
-                    else:
-                        clean_sensor[k] = v
-                clean_data.append(clean_sensor)
-            
-            prompt = f"""Analyze this harmful algae bloom data and provide a concise 5-6 line HTML response.
+            return self.fetch_bedrock_analysis(pollution_data)
+        except Exception as e:
+            print(f"Bedrock analysis error: {e}")
+            return ANALYSIS_UNAVAILABLE_HTML
 
-Data: {json.dumps(clean_data)}
+    def fetch_bedrock_analysis(self, pollution_data):
+        """Like invoke_bedrock_analysis, but raises on failure instead of returning fallback HTML"""
+        payload = self._analysis_payload(pollution_data)
+        cache_key = self.analysis_cache_key(payload)
+        return bedrock_cache.get_or_set(cache_key, lambda: self._invoke_analysis_model(payload))
 
-Format your response exactly like this sample:
-<p><strong>🌊 Location-wise Algae Bloom Levels:</strong></p>
-<p>The <em>North Sea</em> shows the highest algae bloom level at <strong>6.8</strong>, followed by the Caribbean Sea at <strong>3.9</strong>.</p>
-<p><strong>📊 Microalgae Concentration:</strong></p>
-<p>North Sea has <strong>7,297 cells/L</strong>, Caribbean Sea has <strong>3,947 cells/L</strong>, and Atlantic Ocean has <strong>3,167 cells/L</strong>.</p>
-<p><strong>🚨 Status Alert:</strong> The North Sea is in <em>warning status</em>, requiring immediate attention.</p>
+    def peek_bedrock_analysis(self, pollution_data):
+        """Return ``(cache_key, cached_html)`` without calling Bedrock; html is None on a miss"""
+        cache_key = self.analysis_cache_key(self._analysis_payload(pollution_data))
+        return cache_key, bedrock_cache.get(cache_key)
 
-Requirements:
-- Use exactly 5-6 lines with <p> tags
-- Include relevant emojis (🌊 📊 🚨 🔍 🐠)
-- Use <strong> for key numbers and <em> for emphasis
-- Focus on algae bloom levels, microalgae, and status
-- Keep it concise and actionable"""
-            
-            body = {
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 512,
-                "messages": [
-                    {"role": "user", "content": prompt}
-                ]
-            }
-            
-            response = self.bedrock_runtime.invoke_model(
-                modelId="anthropic.claude-3-sonnet-20240229-v1:0",
-                contentType="application/json",
-                accept="application/json",
-                body=json.dumps(body)
-            )
-            
-            result = response['body'].read().decode()
-            result_json = json.loads(result)
-            return result_json["content"][0]["text"]
-        except Exception as e:
-            print(f"Bedrock analysis error: {e}")
-            return "<p><strong>🚨 AI Analysis Temporarily Unavailable</strong></p><p><em>Monitoring systems continue to collect data...</em></p>"
+    def _analysis_payload(self, pollution_data):
+        """Serialize the first three sensors into a stable JSON payload"""
+        # Convert datetime objects and ObjectIds to strings for JSON serialization
+        clean_data = []
+        for sensor in pollution_data[:3]:
+            clean_sensor = {}
+            for k, v in sensor.items():
+                if hasattr(v, 'isoformat'):  # datetime objects
+                    clean_sensor[k] = v.isoformat()
+                elif hasattr(v, '__str__') and k == '_id':  # ObjectId
+                    clean_sensor[k] = str(v)
+                else:
+                    clean_sensor[k] = v
+            clean_data.append(clean_sensor)
+        return json.dumps(clean_data, sort_keys=True)
+
+    def analysis_cache_key(self, payload):
+        """Content address for an analysis payload under the current prompt and model"""
+        digest = hashlib.sha256()
+        for part in (ANALYSIS_MODEL_ID, ANALYSIS_PROMPT_TEMPLATE, payload):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return f"bedrock-analysis:{digest.hexdigest()}"
+
+    def _invoke_analysis_model(self, payload):
+        """Call Claude on Bedrock; raises on failure so errors are never cached"""
+        body = {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": 512,
+            "messages": [
+                {"role": "user", "content": ANALYSIS_PROMPT_TEMPLATE.format(data=payload)}
+            ]
+        }
+        
+        response = self.bedrock_runtime.invoke_model(
+            modelId=ANALYSIS_MODEL_ID,
+            contentType="application/json",
+            accept="application/json",
+            body=json.dumps(body)
+        )
+        
+        result = response['body'].read().decode()
+        result_json = json.loads(result)
+        return result_json["content"][0]["text"]
     
     def synthesize_speech(self, text, voice_id='Joanna'):
         """Convert text to speech using Polly"""
@@ -258,79 +320,73 @@ Requirements:
     def get_prediction_data(self):
         """Get harmful algae bloom prediction data based on MongoDB sensor data"""
         try:
-            from models import mongodb
-            sensor_data = mongodb.get_recent_sensor_data(limit=10)
-            if not sensor_data:
+            predictions = dashboard_cache.get_or_set('prediction_data', self._load_prediction_data)
+            if not predictions:
                 print("Error: No sensor data for predictions.")
-                return []
-            # Real prediction logic here (placeholder: just echo sensor_data)
-            # TODO: Replace with real ML model or SageMaker call
-            predictions = []
-            for sensor in sensor_data:
-                predictions.append({
-                    'region': sensor.get('location', 'Unknown'),
-                    'current_level': sensor.get('pollution_level', 0),
-                    'predicted_7days': sensor.get('pollution_level', 0),
-                    'predicted_30days': sensor.get('pollution_level', 0),
-                    'trend': 'stable',
-                    'confidence': 90
-                })
-            return predictions
+            return copy.deepcopy(predictions)
         except Exception as e:
             print(f"Error getting prediction data from MongoDB: {e}")
             return []
-    
-    def _generate_dynamic_predictions(self):
-        """Generate dynamic prediction data"""
-        import random
-        
-        # Dynamic ocean regions
-        regions = ['Pacific Ocean', 'Atlantic Ocean', 'Mediterranean Sea', 'Indian Ocean', 'Arctic Ocean']
+
+    def _load_prediction_data(self):
+        """Serve the latest materialized predictions, forecasting the recent readings if they are stale"""
+        from models import mongodb
+        from materialization import describe_run, dashboard_predictions
+        run = mongodb.get_latest_prediction_run()
+        if run and not describe_run(run)['stale']:
+            predictions = dashboard_predictions(mongodb.get_materialized_predictions(run['version']))
+            if predictions:
+                return predictions
+        return self.build_predictions(self.get_iot_sensor_data())
+
+    def build_predictions(self, sensor_data):
+        """Forecast each region in ``sensor_data`` from its fitted sensor history.
+
+        ``current_level`` is the mean of the given readings; 7 and 30 day
+        values and their 95% intervals come from the local forecasting engine.
+        Regions without enough history fall back to their current level.
+        """
+        forecast_engine.refresh()
+        region_levels = {}
+        for sensor in sensor_data:
+            region_levels.setdefault(sensor.get('location', 'Unknown'), []).append(sensor.get('pollution_level', 0))
         predictions = []
-        
-        for i, region in enumerate(regions):
-            # Base pollution levels by region
-            base_levels = {
-                'Mediterranean Sea': 8.5,
-                'Pacific Ocean': 7.0,
-                'Atlantic Ocean': 5.5,
-                'Indian Ocean': 6.0,
-                'Arctic Ocean': 3.0
-            }
-            
-            current_level = base_levels.get(region, 5.0) + random.uniform(-1.0, 1.0)
-            current_level = max(0.1, min(10.0, current_level))
-            
-            # Generate realistic predictions
-            trend_factor = 1.0 + random.uniform(-0.1, 0.15)
-            predicted_7days = min(10.0, current_level * trend_factor)
-            predicted_30days = min(10.0, current_level * (trend_factor ** 1.5))
-            
-            # Determine trend
-            trend = 'stable'
-            if predicted_7days > current_level * 1.05:
-                trend = 'increasing'
-            elif predicted_7days < current_level * 0.95:
-                trend = 'decreasing'
-            
+        for region, levels in region_levels.items():
+            current_level = sum(levels) / len(levels)
+            forecast = forecast_engine.forecast(region)
+            if forecast is None:
+                predicted_7days = predicted_30days = current_level
+                interval_7days = interval_30days = None
+                confidence = 50
+                model = 'persistence'
+            else:
+                predicted_7days, low_7, high_7 = forecast['horizons'][7]
+                predicted_30days, low_30, high_30 = forecast['horizons'][30]
+                interval_7days = [round(low_7, 1), round(high_7, 1)]
+                interval_30days = [round(low_30, 1), round(high_30, 1)]
+                confidence = interval_confidence(low_7, high_7)
+                model = forecast['model']
+            trend = trend_label(current_level, predicted_7days)
             predictions.append({
                 'region': region,
                 'current_level': round(current_level, 1),
                 'predicted_7days': round(predicted_7days, 1),
                 'predicted_30days': round(predicted_30days, 1),
+                'interval_7days': interval_7days,
+                'interval_30days': interval_30days,
                 'trend': trend,
-                'confidence': round(80 + random.uniform(0, 15), 1)
+                'confidence': confidence,
+                'model': model
             })
-        
         return predictions
     
     def get_cleanup_coordination(self):
         """Get cleanup coordination data from MongoDB"""
         try:
             from models import mongodb
-            cleanup_data = mongodb.get_cleanup_data()
+            cleanup_data = dashboard_cache.get_or_set('cleanup_coordination', mongodb.get_cleanup_data)
             if cleanup_data:
-                return cleanup_data
+                return copy.deepcopy(cleanup_data)
             else:
                 print("Error: No cleanup data found in MongoDB.")
                 return {}
@@ -933,42 +989,32 @@ def lambda_handler(event, context):
             print(f"Error creating data lake bucket: {e}")
             return None
     
-    def upload_pollution_data(self, bucket_name, data, data_type='sensor_data'):
-        """Upload pollution data to S3 with proper organization"""
+    def upload_stream(self, bucket_name, key, data, content_type, metadata=None):
+        """Stream bytes or a file object to S3, in concurrent parts above MEDIA_MULTIPART_THRESHOLD"""
+        extra_args = {'ContentType': content_type}
+        if metadata:
+            extra_args['Metadata'] = metadata
+        self.s3_transfer.upload_fileobj(as_stream(data), bucket_name, key, ExtraArgs=extra_args, Config=media_transfer_config())
+    
+    def upload_pollution_data(self, bucket_name, data, data_type='sensor_data', content_type=None):
+        """Upload pollution data (a dict, bytes or an open file) to S3 with proper organization"""
         try:
             timestamp = datetime.now().strftime("%Y/%m/%d/%H%M%S")
             
             # Organize data by type and date
-            if data_type == 'sensor_data':
-                key = f"raw-data/sensors/{timestamp}.json"
-            elif data_type == 'reports':
-                key = f"raw-data/reports/{timestamp}.json"
-            elif data_type == 'images':
-                key = f"raw-data/images/{timestamp}.jpg"
-            elif data_type == 'analysis':
-                key = f"processed-data/analysis/{timestamp}.json"
-            else:
-                key = f"raw-data/{data_type}/{timestamp}.json"
+            extension = 'jpg' if data_type == 'images' else 'json'
+            key = f"{data_type_prefix(data_type)}{timestamp}.{extension}"
             
-            # Upload data
+            # Upload data; file objects are streamed rather than read into memory
             if isinstance(data, dict):
-                data_content = json.dumps(data, indent=2)
+                data = json.dumps(data, indent=2)
                 content_type = 'application/json'
-            else:
-                data_content = data
-                content_type = 'application/octet-stream'
             
-            self.s3.put_object(
-                Bucket=bucket_name,
-                Key=key,
-                Body=data_content,
-                ContentType=content_type,
-                Metadata={
-                    'data_type': data_type,
-                    'uploaded_at': datetime.now().isoformat(),
-                    'source': 'gppnn-system'
-                }
-            )
+            self.upload_stream(bucket_name, key, data, content_type or 'application/octet-stream', metadata={
+                'data_type': data_type,
+                'uploaded_at': datetime.now().isoformat(),
+                'source': 'gppnn-system'
+            })
             
             return {
                 'bucket_name': bucket_name,
@@ -980,8 +1026,12 @@ def lambda_handler(event, context):
             print(f"Error uploading pollution data: {e}")
             return None
     
-    def create_backup_snapshot(self, source_bucket, backup_bucket=None):
-        """Create backup snapshot of pollution data"""
+    def create_backup_snapshot(self, source_bucket, backup_bucket=None, snapshot_id=None):
+        """Start (or resume) a backup snapshot of pollution data in the background.
+
+        Returns as soon as the copy is scheduled; poll ``get_backup_status``
+        with the returned ``snapshot_id`` (and ``job_id``) for progress.
+        """
         try:
             if not backup_bucket:
                 timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
@@ -1006,81 +1056,103 @@ def lambda_handler(event, context):
             try:
                 self.s3.create_bucket(Bucket=backup_bucket)
             except Exception as e:
-                if 'BucketAlreadyExists' not in str(e):
+                if 'BucketAlreadyExists' not in str(e) and 'BucketAlreadyOwnedByYou' not in str(e):
                     print(f"Error creating backup bucket: {e}")
                     return None
             
-            # List all objects in source bucket
-            try:
-                objects = self.s3.list_objects_v2(Bucket=source_bucket)
-            except Exception as e:
-                print(f"Error listing objects in source bucket: {e}")
+            if source_bucket == backup_bucket:
+                print("Error creating backup snapshot: backup bucket must differ from the source bucket")
                 return None
             
-            backup_count = 0
-            for obj in objects.get('Contents', []):
-                source_key = obj['Key']
-                backup_key = f"backup-{datetime.now().strftime('%Y%m%d-%H%M%S')}/{source_key}"
-                
-                try:
-                    # Copy object to backup bucket
-                    self.s3.copy_object(
-                        Bucket=backup_bucket,
-                        CopySource={'Bucket': source_bucket, 'Key': source_key},
-                        Key=backup_key
-                    )
-                    backup_count += 1
-                except Exception as e:
-                    print(f"Error copying object {source_key}: {e}")
-                    continue
+            # Copy every object under one snapshot prefix, checkpointing to a manifest.
+            # Runs for the same snapshot share a job, so a resume cannot race a running copy.
+            snapshot_id = snapshot_id or new_snapshot_id()
+            job_id = backup_jobs.submit(
+                self.run_backup_snapshot, source_bucket, backup_bucket, snapshot_id,
+                key=f"{backup_bucket}/{snapshot_id}"
+            )
             
             return {
                 'source_bucket': source_bucket,
                 'backup_bucket': backup_bucket,
-                'objects_backed_up': backup_count,
+                'snapshot_id': snapshot_id,
+                'snapshot_prefix': f"{snapshot_id}/",
+                'manifest_key': snapshot_manifest_key(snapshot_id),
+                'job_id': job_id,
                 'backup_timestamp': datetime.now().isoformat(),
-                'status': 'completed'
+                'status': 'started'
             }
         except Exception as e:
             print(f"Error creating backup snapshot: {e}")
             return None
     
+    def run_backup_snapshot(self, source_bucket, backup_bucket, snapshot_id):
+        """Copy a snapshot to completion (runs on the backup job pool)"""
+        manifest = BackupEngine(self.s3_transfer).run(source_bucket, backup_bucket, snapshot_id)
+        for failure in manifest['failed'][:10]:
+            print(f"Error copying object {failure['key']}: {failure['error']}")
+        return backup_summary(manifest)
+    
+    def get_backup_status(self, backup_bucket, snapshot_id, job_id=None):
+        """Progress of a backup snapshot from its manifest, plus its job status when ``job_id`` is given.
+
+        Returns None when neither the manifest nor the job exists; S3 errors are raised.
+        """
+        manifest = BackupEngine(self.s3_transfer).load_manifest(backup_bucket, snapshot_id)
+        job = backup_jobs.status(job_id) if job_id else None
+        if manifest is None and (job is None or job['status'] == 'unknown'):
+            return None
+        if manifest is None:
+            # Scheduled but not yet started
+            result = {'backup_bucket': backup_bucket, 'snapshot_id': snapshot_id, 'status': 'pending'}
+        else:
+            result = backup_summary(manifest)
+        if job is not None:
+            result['job_status'] = job['status']
+            if 'error' in job:
+                result['error'] = job['error']
+        return result
+    
+    def export_sensor_data(self, bucket_name, limit=None):
+        """Export sensor readings stored since the last export as partitioned gzip NDJSON"""
+        try:
+            result = SensorExporter(self.s3_transfer).export(bucket_name, limit=limit)
+            result.setdefault('status', 'exported')
+            result.update({'bucket_name': bucket_name, 'prefix': f"s3://{bucket_name}/{EXPORT_PREFIX}"})
+            return result
+        except Exception as e:
+            print(f"Error exporting sensor data: {e}")
+            return None
+    
     def get_data_analytics(self, bucket_name, data_type='sensor_data'):
-        """Get analytics on stored data"""
+        """Get analytics on stored data, listing only days not already summarized"""
+        from models import mongodb
         try:
-            # List objects with specific prefix
-            prefix = f"raw-data/{data_type}/"
-            objects = self.s3.list_objects_v2(Bucket=bucket_name, Prefix=prefix)
+            prefix = data_type_prefix(data_type)
+            cached_days = mongodb.get_data_lake_days(bucket_name, prefix)
+            scan = PrefixScanner(self.s3_transfer).scan(bucket_name, prefix, cached_days)
+            mongodb.store_data_lake_days(bucket_name, prefix, {day: scan['days'][day] for day in scan['settled']})
+            
+            # Merge the per-day summaries with objects outside the date partitions
+            total = empty_summary()
+            for summary in scan['days'].values():
+                merge_summary(total, summary)
+            merge_summary(total, scan['undated'])
+            days = sorted(day for day, summary in scan['days'].items() if summary['files'])
             
-            analytics = {
+            return {
                 'data_type': data_type,
-                'total_files': len(objects.get('Contents', [])),
-                'total_size_bytes': 0,
-                'date_range': {'earliest': None, 'latest': None},
-                'file_types': {},
-                'locations': set()
+                'prefix': prefix,
+                'total_files': total['files'],
+                'total_size_bytes': total['bytes'],
+                'date_range': {'earliest': days[0] if days else None, 'latest': days[-1] if days else None},
+                'file_types': total['file_types'],
+                'locations': [],
+                'days': len(days),
+                'days_listed': len(scan['listed']),
+                'days_cached': len(scan['days']) - len(scan['listed']),
+                'undated_files': scan['undated']['files']
             }
-            
-            for obj in objects.get('Contents', []):
-                analytics['total_size_bytes'] += obj['Size']
-                
-                # Extract date from key
-                key_parts = obj['Key'].split('/')
-                if len(key_parts) >= 4:
-                    date_str = '/'.join(key_parts[1:4])  # YYYY/MM/DD
-                    if not analytics['date_range']['earliest'] or date_str < analytics['date_range']['earliest']:
-                        analytics['date_range']['earliest'] = date_str
-                    if not analytics['date_range']['latest'] or date_str > analytics['date_range']['latest']:
-                        analytics['date_range']['latest'] = date_str
-                
-                # Get file extension
-                file_ext = obj['Key'].split('.')[-1] if '.' in obj['Key'] else 'unknown'
-                analytics['file_types'][file_ext] = analytics['file_types'].get(file_ext, 0) + 1
-            
-            # Convert set to list for JSON serialization
-            analytics['locations'] = list(analytics['locations'])
-            
-            return analytics
         except Exception as e:
             print(f"Error getting data analytics: {e}")
             return None
@@ -1220,14 +1292,9 @@ def lambda_handler(event, context):
             bucket_name = f"pollution-audio-{int(time.time())}"
             self.s3.create_bucket(Bucket=bucket_name)
             
-            # Upload audio data to S3
+            # Stream audio data (bytes or an open file) to S3
             audio_key = f"audio/{job_name}.mp3"
-            self.s3.put_object(
-                Bucket=bucket_name,
-                Key=audio_key,
-                Body=audio_data,
-                ContentType='audio/mpeg'
-            )
+            self.upload_stream(bucket_name, audio_key, audio_data, 'audio/mpeg')
             
             # Start transcription job
             media_uri = f"s3://{bucket_name}/{audio_key}"
@@ -1271,8 +1338,7 @@ def lambda_handler(event, context):
         ]
         
         # Use hash of audio data to select consistent transcript
-        import hashlib
-        hash_value = hashlib.md5(audio_data).hexdigest()
+        hash_value = stream_digest(audio_data)
         index = int(hash_value, 16) % len(sample_transcripts)
         
         return sample_transcripts[index]
@@ -1665,6 +1731,49 @@ def lambda_handler(event, context):
             print(f"Error invoking Bedrock agent: {e}")
             return None
     
+    def invoke_bedrock_agent_many(self, agent_id, prompts, timeout=None):
+        """Invoke the agent for each ``{key: prompt}`` on a bounded thread pool.
+
+        Waits at most ``timeout`` seconds overall and returns ``{key: result}``;
+        calls that failed or did not finish in time map to None.
+        """
+        timeout = Config.AGENT_CALL_TIMEOUT if timeout is None else timeout
+        futures = {self._agent_pool.submit(self.invoke_bedrock_agent, agent_id, prompt): key for key, prompt in prompts.items()}
+        done, not_done = wait(futures, timeout=timeout)
+        results = {key: None for key in prompts}
+        for future in done:
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                print(f"Error invoking Bedrock agent for {futures[future]}: {e}")
+        for future in not_done:
+            future.cancel()
+        if not_done:
+            print(f"Bedrock agent timed out for {len(not_done)} of {len(prompts)} requests")
+        return results
+
+    def invoke_bedrock_agent_batch(self, agent_id, prompts):
+        """Send every ``{key: prompt}`` to the agent in one request and split the reply.
+
+        The agent is asked to answer each item under a ``### <key>`` heading.
+        Returns ``{key: response_html}``; keys missing from the reply map to None.
+        """
+        sections = "\n\n".join(f"### {key}\n{prompt}" for key, prompt in prompts.items())
+        batch_prompt = (
+            "Answer each alert request below independently. Start each answer with the same "
+            "'### <id>' heading line as its request and put only that answer under it.\n\n"
+            f"{sections}"
+        )
+        agent_result = self.invoke_bedrock_agent(agent_id, batch_prompt)
+        reply = agent_result.get('response', '') if agent_result else ''
+        results = {key: None for key in prompts}
+        parts = re.split(r'^###\s*(\S+)\s*$', reply, flags=re.MULTILINE)
+        # re.split yields [preamble, key1, body1, key2, body2, ...]
+        for key, body in zip(parts[1::2], parts[2::2]):
+            if key in results and body.strip():
+                results[key] = body.strip()
+        return results
+
     def create_iam_role(self, role_name, policies=None):
         """Create IAM role for AWS services"""
         try:
@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+
+# AquaPulse - In-process caching for dashboard aggregates and AI responses
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one in-flight call.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight wait and receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def in_flight(self, key):
+        """Whether a call for ``key`` is currently running"""
+        with self._lock:
+            return key in self._calls
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-key expiry.
+
+    Entries expire ``ttl`` seconds after they are stored. Once ``maxsize``
+    entries are held, the least recently used one is evicted.
+    """
+
+    def __init__(self, maxsize=256, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+        self._flights = SingleFlight()
+        self._generation = 0
+
+    def get(self, key, default=None):
+        """Return a live cached value, or ``default`` if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Store a value, evicting least recently used entries over ``maxsize``"""
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key, loader, ttl=None):
+        """Return the cached value for ``key``, calling ``loader`` on a miss.
+
+        Concurrent misses on the same key wait for a single ``loader`` call
+        rather than each hitting the backing store.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+
+        def load():
+            cached = self.get(key, missing)
+            if cached is not missing:
+                return cached
+            generation = self._generation
+            loaded = loader()
+            with self._lock:
+                # Skip the store if an invalidation raced with the load
+                if generation == self._generation:
+                    self.set(key, loaded, ttl)
+            return loaded
+
+        return self._flights.do(key, load)
+
+    def invalidate(self, *keys):
+        """Drop the given keys from the cache"""
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+# Shared cache for AWSServices dashboard getters
+dashboard_cache = TTLCache(maxsize=Config.DASHBOARD_CACHE_MAXSIZE, ttl=Config.DASHBOARD_CACHE_TTL)
+
+# Keys derived from the sensors collection, dropped whenever new readings land
+SENSOR_CACHE_KEYS = ('iot_sensor_data', 'prediction_data')
+
+# Keys derived from the pollution_reports collection, dropped on report writes
+REPORT_CACHE_KEYS = ('citizen_report_analytics',)
+
+# Content-addressed cache for Bedrock analysis responses
+bedrock_cache = TTLCache(maxsize=Config.BEDROCK_CACHE_MAXSIZE, ttl=Config.BEDROCK_CACHE_TTL)
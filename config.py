@@ -8,6 +8,76 @@ class Config:
     
     # MongoDB Configuration
     MONGODB_URI = os.environ.get('MONGODB_URI')
+    AUTO_SEED = os.environ.get('AUTO_SEED', 'true').lower() == 'true'  # seed demo data into an empty database on import
+    SENSOR_BULK_BATCH_SIZE = int(os.environ.get('SENSOR_BULK_BATCH_SIZE', 1000))
+    REPORTS_PAGE_SIZE = int(os.environ.get('REPORTS_PAGE_SIZE', 100))
+    REPORTS_MAX_PAGE_SIZE = int(os.environ.get('REPORTS_MAX_PAGE_SIZE', 1000))
+    JSON_ENCODER_BACKEND = os.environ.get('JSON_ENCODER_BACKEND', 'auto')  # auto, orjson or json
+    RAW_BSON_BATCH_SIZE = int(os.environ.get('RAW_BSON_BATCH_SIZE', 1000))
+    FORECAST_HISTORY_DAYS = int(os.environ.get('FORECAST_HISTORY_DAYS', 90))
+    FORECAST_REFRESH_INTERVAL = float(os.environ.get('FORECAST_REFRESH_INTERVAL', 60))
+    PREDICTION_JOB_INTERVAL = float(os.environ.get('PREDICTION_JOB_INTERVAL', 300))
+    PREDICTION_MAX_AGE = float(os.environ.get('PREDICTION_MAX_AGE', 900))
+    PREDICTION_HORIZONS = [int(h) for h in os.environ.get('PREDICTION_HORIZONS', '7,30').split(',')]
+    PREDICTION_VERSIONS_KEPT = int(os.environ.get('PREDICTION_VERSIONS_KEPT', 3))
+    GEOHASH_PRECISION = int(os.environ.get('GEOHASH_PRECISION', 9))
+    HOTSPOT_THRESHOLD = float(os.environ.get('HOTSPOT_THRESHOLD', 6))
+    HOTSPOT_QUERY_LIMIT = int(os.environ.get('HOTSPOT_QUERY_LIMIT', 500))
+    HOTSPOT_CLUSTER_EPS_KM = float(os.environ.get('HOTSPOT_CLUSTER_EPS_KM', 150))
+    HOTSPOT_CLUSTER_MIN_SAMPLES = int(os.environ.get('HOTSPOT_CLUSTER_MIN_SAMPLES', 2))
+    MAP_MAX_POINTS = int(os.environ.get('MAP_MAX_POINTS', 500))
+    MAP_MAX_CELLS = int(os.environ.get('MAP_MAX_CELLS', 1000))
+    MAP_POINTS_MIN_ZOOM = int(os.environ.get('MAP_POINTS_MIN_ZOOM', 10))
+    SENSOR_STORAGE_MODE = os.environ.get('SENSOR_STORAGE_MODE', 'documents')  # documents or dual (documents + hourly buckets)
+    SENSOR_BUCKET_MAX_READINGS = int(os.environ.get('SENSOR_BUCKET_MAX_READINGS', 720))
+    HISTORY_TARGET_WINDOWS = int(os.environ.get('HISTORY_TARGET_WINDOWS', 500))
+    HISTORY_MAX_WINDOWS = int(os.environ.get('HISTORY_MAX_WINDOWS', 5000))
+    HISTORY_DB_PERCENTILES = os.environ.get('HISTORY_DB_PERCENTILES', 'false').lower() == 'true'  # $percentile needs MongoDB 7.0+
+
+    # Background sensor ingestion
+    INGEST_QUEUE_MAXSIZE = int(os.environ.get('INGEST_QUEUE_MAXSIZE', 10000))
+    INGEST_BATCH_SIZE = int(os.environ.get('INGEST_BATCH_SIZE', 500))
+    INGEST_FLUSH_INTERVAL = float(os.environ.get('INGEST_FLUSH_INTERVAL', 2.0))
+
+    # Dashboard aggregate cache
+    DASHBOARD_CACHE_TTL = float(os.environ.get('DASHBOARD_CACHE_TTL', 30))
+    DASHBOARD_CACHE_MAXSIZE = int(os.environ.get('DASHBOARD_CACHE_MAXSIZE', 256))
+    ANALYTICS_CACHE_TTL = float(os.environ.get('ANALYTICS_CACHE_TTL', 10))
+
+    # S3 data lake backups
+    BACKUP_MAX_WORKERS = int(os.environ.get('BACKUP_MAX_WORKERS', 16))
+    BACKUP_MULTIPART_THRESHOLD = int(os.environ.get('BACKUP_MULTIPART_THRESHOLD', 256 * 1024 * 1024))
+    BACKUP_MULTIPART_CHUNKSIZE = int(os.environ.get('BACKUP_MULTIPART_CHUNKSIZE', 64 * 1024 * 1024))
+    BACKUP_PART_CONCURRENCY = int(os.environ.get('BACKUP_PART_CONCURRENCY', 4))
+    BACKUP_CHECKPOINT_EVERY = int(os.environ.get('BACKUP_CHECKPOINT_EVERY', 5000))
+    BACKUP_JOB_WORKERS = int(os.environ.get('BACKUP_JOB_WORKERS', 2))
+    BACKUP_JOB_TIMEOUT = float(os.environ.get('BACKUP_JOB_TIMEOUT', 6 * 3600))
+    BACKUP_JOB_RETENTION = float(os.environ.get('BACKUP_JOB_RETENTION', 24 * 3600))
+    DATA_LAKE_SCAN_WORKERS = int(os.environ.get('DATA_LAKE_SCAN_WORKERS', 16))
+    DATA_LAKE_SETTLE_DAYS = int(os.environ.get('DATA_LAKE_SETTLE_DAYS', 1))  # days before a partition's summary is cached
+    EXPORT_TARGET_FILE_BYTES = int(os.environ.get('EXPORT_TARGET_FILE_BYTES', 64 * 1024 * 1024))
+    EXPORT_MAX_OPEN_FILES = int(os.environ.get('EXPORT_MAX_OPEN_FILES', 64))
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 5000))
+    EXPORT_LAG_SECONDS = float(os.environ.get('EXPORT_LAG_SECONDS', 60))
+    EXPORT_SPOOL_BYTES = int(os.environ.get('EXPORT_SPOOL_BYTES', 8 * 1024 * 1024))
+    EXPORT_LEASE_SECONDS = float(os.environ.get('EXPORT_LEASE_SECONDS', 900))
+    MEDIA_MULTIPART_THRESHOLD = int(os.environ.get('MEDIA_MULTIPART_THRESHOLD', 8 * 1024 * 1024))
+    MEDIA_MULTIPART_CHUNKSIZE = int(os.environ.get('MEDIA_MULTIPART_CHUNKSIZE', 8 * 1024 * 1024))
+    MEDIA_UPLOAD_CONCURRENCY = int(os.environ.get('MEDIA_UPLOAD_CONCURRENCY', 4))
+
+    # Bedrock analysis response cache
+    BEDROCK_CACHE_TTL = float(os.environ.get('BEDROCK_CACHE_TTL', 300))
+    BEDROCK_CACHE_MAXSIZE = int(os.environ.get('BEDROCK_CACHE_MAXSIZE', 128))
+
+    # Background AI jobs
+    AI_JOB_WORKERS = int(os.environ.get('AI_JOB_WORKERS', 4))
+    AI_JOB_TIMEOUT = float(os.environ.get('AI_JOB_TIMEOUT', 45))
+    AI_JOB_RETENTION = float(os.environ.get('AI_JOB_RETENTION', 300))
+
+    # Bedrock agent fan-out for AI alerts ('parallel' or 'batch')
+    AI_ALERTS_MODE = os.environ.get('AI_ALERTS_MODE', 'parallel')
+    AGENT_MAX_WORKERS = int(os.environ.get('AGENT_MAX_WORKERS', 8))
+    AGENT_CALL_TIMEOUT = float(os.environ.get('AGENT_CALL_TIMEOUT', 10))
     
     # Application Configuration
     SECRET_KEY = os.environ.get('SECRET_KEY', 'set-a-strong-secret-key')
@@ -0,0 +1,499 @@
+import gzip
+import hashlib
+import io
+import json
+import re
+import tempfile
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from boto3.s3.transfer import TransferConfig
+from bson import ObjectId
+from config import Config
+from json_provider import MongoJSONProvider
+
+# AquaPulse - S3 data lake backups, prefix scans, sensor exports and media uploads
+
+MANIFEST_PREFIX = 'manifests'
+
+# Partitioned sensor exports: <prefix>region=<r>/date=<YYYY-MM-DD>/hour=<HH>/part-<first _id>.ndjson.gz
+EXPORT_PREFIX = 'exports/sensors/'
+
+# Where each kind of upload lives in the data lake; other types go under raw-data/<type>/
+DATA_TYPE_PREFIXES = {
+    'sensor_data': 'raw-data/sensors/',
+    'reports': 'raw-data/reports/',
+    'images': 'raw-data/images/',
+    'analysis': 'processed-data/analysis/'
+}
+
+# Date partitions below a data type prefix: YYYY/, MM/ and DD/
+DATE_LEVELS = (re.compile(r'\d{4}/'), re.compile(r'\d{2}/'), re.compile(r'\d{2}/'))
+
+# CopyObject rejects sources larger than 5 GiB; those must be copied in parts
+COPY_OBJECT_MAX_BYTES = 5 * 1024 ** 3
+
+
+def new_snapshot_id(now=None):
+    """Name of a backup snapshot, which is also its key prefix in the backup bucket"""
+    return f"backup-{(now or datetime.now()).strftime('%Y%m%d-%H%M%S')}"
+
+
+def snapshot_manifest_key(snapshot_id):
+    """Key of a snapshot's manifest in the backup bucket"""
+    return f"{MANIFEST_PREFIX}/{snapshot_id}.json"
+
+
+def backup_summary(manifest):
+    """API view of a backup manifest"""
+    return {
+        'source_bucket': manifest['source_bucket'],
+        'backup_bucket': manifest['backup_bucket'],
+        'snapshot_id': manifest['snapshot_id'],
+        'snapshot_prefix': f"{manifest['snapshot_id']}/",
+        'manifest_key': snapshot_manifest_key(manifest['snapshot_id']),
+        'objects_backed_up': manifest['objects_copied'],
+        'bytes_backed_up': manifest['bytes_copied'],
+        'objects_failed': len(manifest['failed']),
+        'duration_seconds': manifest.get('duration_seconds'),
+        'backup_timestamp': manifest.get('updated_at'),
+        'status': manifest['status']
+    }
+
+
+def media_transfer_config():
+    """Multipart settings for streamed media uploads"""
+    return TransferConfig(
+        multipart_threshold=Config.MEDIA_MULTIPART_THRESHOLD,
+        multipart_chunksize=Config.MEDIA_MULTIPART_CHUNKSIZE,
+        max_concurrency=Config.MEDIA_UPLOAD_CONCURRENCY
+    )
+
+
+def as_stream(data):
+    """Binary stream over bytes, a string or an open file object, rewound to its start"""
+    if hasattr(data, 'read'):
+        try:
+            data.seek(0)
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            pass
+        return data
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return io.BytesIO(data)
+
+
+def stream_size(stream):
+    """Length in bytes of a seekable stream, leaving its position unchanged"""
+    position = stream.tell()
+    size = stream.seek(0, io.SEEK_END)
+    stream.seek(position)
+    return size
+
+
+def stream_digest(stream, chunk_size=1024 * 1024):
+    """MD5 hex digest of a stream, read in chunks from its start"""
+    stream = as_stream(stream)
+    digest = hashlib.md5()
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def data_type_prefix(data_type):
+    """Key prefix holding uploads of ``data_type``"""
+    return DATA_TYPE_PREFIXES.get(data_type, f"raw-data/{data_type}/")
+
+
+def empty_summary():
+    return {'files': 0, 'bytes': 0, 'file_types': {}}
+
+
+def add_to_summary(summary, key, size):
+    summary['files'] += 1
+    summary['bytes'] += size
+    name = key.rsplit('/', 1)[-1]
+    file_ext = name.rsplit('.', 1)[-1] if '.' in name else 'unknown'
+    summary['file_types'][file_ext] = summary['file_types'].get(file_ext, 0) + 1
+
+
+def merge_summary(total, summary):
+    total['files'] += summary['files']
+    total['bytes'] += summary['bytes']
+    for file_ext, count in summary['file_types'].items():
+        total['file_types'][file_ext] = total['file_types'].get(file_ext, 0) + count
+
+
+def iter_objects(s3, bucket, prefix='', start_after=None):
+    """Yield ``(key, size)`` for every object under ``prefix`` in key order"""
+    params = {'Bucket': bucket, 'Prefix': prefix}
+    if start_after:
+        params['StartAfter'] = start_after
+    for page in s3.get_paginator('list_objects_v2').paginate(**params):
+        for obj in page.get('Contents', []):
+            yield obj['Key'], obj['Size']
+
+
+class BackupEngine:
+    """Server-side copy of a bucket into a single snapshot prefix of another bucket.
+
+    The source is listed with a paginator and copied on a bounded thread
+    pool; objects above ``multipart_threshold`` are copied in parts. Progress
+    is checkpointed to ``manifests/<snapshot_id>.json`` in the backup bucket
+    as the last key before which every object has been handled, so an
+    interrupted backup resumes from there instead of starting over.
+    """
+
+    def __init__(self, s3, max_workers=None, multipart_threshold=None, multipart_chunksize=None,
+                 part_concurrency=None, checkpoint_every=None):
+        self.s3 = s3
+        self.max_workers = max_workers or Config.BACKUP_MAX_WORKERS
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold or Config.BACKUP_MULTIPART_THRESHOLD,
+            multipart_chunksize=multipart_chunksize or Config.BACKUP_MULTIPART_CHUNKSIZE,
+            max_concurrency=part_concurrency or Config.BACKUP_PART_CONCURRENCY
+        )
+        self.checkpoint_every = checkpoint_every or Config.BACKUP_CHECKPOINT_EVERY
+
+    def manifest_key(self, snapshot_id):
+        return snapshot_manifest_key(snapshot_id)
+
+    def load_manifest(self, backup_bucket, snapshot_id):
+        """Saved manifest of a snapshot, or None if it was never started"""
+        try:
+            response = self.s3.get_object(Bucket=backup_bucket, Key=self.manifest_key(snapshot_id))
+        except self.s3.exceptions.NoSuchKey:
+            return None
+        return json.loads(response['Body'].read())
+
+    def save_manifest(self, manifest):
+        manifest['updated_at'] = datetime.now().isoformat()
+        self.s3.put_object(
+            Bucket=manifest['backup_bucket'],
+            Key=self.manifest_key(manifest['snapshot_id']),
+            Body=json.dumps(manifest).encode('utf-8'),
+            ContentType='application/json'
+        )
+
+    def copy_object(self, source_bucket, backup_bucket, snapshot_id, key, size):
+        """Copy one object into the snapshot prefix; returns the bytes copied"""
+        source = {'Bucket': source_bucket, 'Key': key}
+        target = f"{snapshot_id}/{key}"
+        if size >= self.transfer_config.multipart_threshold or size > COPY_OBJECT_MAX_BYTES:
+            self.s3.copy(source, backup_bucket, target, Config=self.transfer_config)
+        else:
+            self.s3.copy_object(Bucket=backup_bucket, CopySource=source, Key=target)
+        return size
+
+    def run(self, source_bucket, backup_bucket, snapshot_id=None, prefix=''):
+        """Back up ``source_bucket`` (optionally only ``prefix``) and return the final manifest.
+
+        Passing the ``snapshot_id`` of an unfinished backup resumes it: objects
+        that failed are retried and listing continues after the checkpoint.
+        """
+        if source_bucket == backup_bucket:
+            raise ValueError("Backup bucket must differ from the source bucket")
+        manifest = self.load_manifest(backup_bucket, snapshot_id) if snapshot_id else None
+        if manifest is None:
+            manifest = {
+                'snapshot_id': snapshot_id or new_snapshot_id(),
+                'source_bucket': source_bucket,
+                'backup_bucket': backup_bucket,
+                'prefix': prefix,
+                'started_at': datetime.now().isoformat(),
+                'status': 'in_progress',
+                'start_after': None,
+                'objects_copied': 0,
+                'bytes_copied': 0,
+                'failed': []
+            }
+        elif manifest['status'] == 'completed':
+            return manifest
+
+        started = time.monotonic()
+        retry = manifest['failed']
+        manifest['failed'] = []
+        manifest['status'] = 'in_progress'
+        # Saved up front so the snapshot can be polled before the first checkpoint
+        self.save_manifest(manifest)
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='s3-backup') as pool:
+                self._copy_all(pool, manifest, ((f['key'], f['size']) for f in retry), checkpoint=False)
+                listing = iter_objects(self.s3, source_bucket, manifest['prefix'], manifest['start_after'])
+                self._copy_all(pool, manifest, listing, checkpoint=True)
+            manifest['status'] = 'completed_with_errors' if manifest['failed'] else 'completed'
+        except Exception:
+            manifest['status'] = 'interrupted'
+            raise
+        finally:
+            manifest['duration_seconds'] = round(time.monotonic() - started, 1)
+            try:
+                self.save_manifest(manifest)
+            except Exception as e:
+                print(f"Error saving backup manifest {manifest['snapshot_id']}: {e}")
+        return manifest
+
+    def _copy_all(self, pool, manifest, objects, checkpoint):
+        """Copy ``(key, size)`` pairs, keeping at most a few batches of copies in flight.
+
+        Results are collected in submission (key) order, so when
+        ``checkpoint`` is set ``start_after`` only advances past keys whose
+        copy has finished.
+        """
+        in_flight = deque()
+        window = self.max_workers * 4
+        handled = 0
+
+        def collect(limit):
+            # Wait on the oldest copy while more than ``limit`` are in flight,
+            # then take whichever of the oldest have already finished
+            nonlocal handled
+            while in_flight and (len(in_flight) > limit or in_flight[0][2].done()):
+                key, size, future = in_flight.popleft()
+                try:
+                    manifest['bytes_copied'] += future.result()
+                    manifest['objects_copied'] += 1
+                except Exception as e:
+                    manifest['failed'].append({'key': key, 'size': size, 'error': str(e)})
+                if checkpoint:
+                    manifest['start_after'] = key
+                    handled += 1
+                    if handled % self.checkpoint_every == 0:
+                        self.save_manifest(manifest)
+
+        for key, size in objects:
+            future = pool.submit(self.copy_object, manifest['source_bucket'], manifest['backup_bucket'],
+                                 manifest['snapshot_id'], key, size)
+            in_flight.append((key, size, future))
+            collect(window)
+        collect(0)
+
+
+class PrefixScanner:
+    """Size and file-type summary of a data type prefix, sharded by day.
+
+    Day partitions (``YYYY/MM/DD/``) are discovered with delimiter listings,
+    one level at a time and concurrently per parent. Each day is then
+    listed in full on a thread pool and the per-day summaries are merged.
+    Days older than ``settle_days`` are taken from ``cached_days`` when
+    present, so a repeat scan only lists recent and newly seen days.
+    """
+
+    def __init__(self, s3, max_workers=None, settle_days=None):
+        self.s3 = s3
+        self.max_workers = max_workers or Config.DATA_LAKE_SCAN_WORKERS
+        self.settle_days = settle_days if settle_days is not None else Config.DATA_LAKE_SETTLE_DAYS
+
+    def list_level(self, bucket, prefix):
+        """Child prefixes directly below ``prefix`` and a summary of the objects at that level"""
+        children = []
+        loose = empty_summary()
+        pages = self.s3.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=prefix, Delimiter='/')
+        for page in pages:
+            children.extend(entry['Prefix'] for entry in page.get('CommonPrefixes', []))
+            for obj in page.get('Contents', []):
+                add_to_summary(loose, obj['Key'], obj['Size'])
+        return children, loose
+
+    def summarize(self, bucket, prefix):
+        """Summary of every object under ``prefix``"""
+        summary = empty_summary()
+        for key, size in iter_objects(self.s3, bucket, prefix):
+            add_to_summary(summary, key, size)
+        return summary
+
+    def discover_days(self, pool, bucket, prefix):
+        """``(day prefixes, undated prefixes, loose summary)`` below a data type prefix"""
+        level = [prefix]
+        undated = []
+        loose = empty_summary()
+        for pattern in DATE_LEVELS:
+            next_level = []
+            for children, level_loose in pool.map(lambda p: self.list_level(bucket, p), level):
+                merge_summary(loose, level_loose)
+                for child in children:
+                    if pattern.fullmatch(child.rsplit('/', 2)[-2] + '/'):
+                        next_level.append(child)
+                    else:
+                        undated.append(child)
+            level = next_level
+        return level, undated, loose
+
+    def scan(self, bucket, prefix, cached_days=None):
+        """Scan ``prefix`` and return per-day summaries plus undated totals.
+
+        Returns ``{'days': {'YYYY/MM/DD': summary}, 'undated': summary,
+        'listed': [...], 'settled': [...]}``, where ``listed`` names the days
+        that were listed this time and ``settled`` those old enough to cache.
+        """
+        cached_days = cached_days or {}
+        cutoff = (datetime.now() - timedelta(days=self.settle_days)).strftime('%Y/%m/%d')
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='s3-scan') as pool:
+            day_prefixes, undated_prefixes, undated = self.discover_days(pool, bucket, prefix)
+            days = {}
+            to_list = []
+            for day_prefix in day_prefixes:
+                day = day_prefix[len(prefix):].rstrip('/')
+                if day < cutoff and day in cached_days:
+                    days[day] = cached_days[day]
+                else:
+                    to_list.append((day, day_prefix))
+            listed = pool.map(lambda item: self.summarize(bucket, item[1]), to_list)
+            undated_listed = pool.map(lambda p: self.summarize(bucket, p), undated_prefixes)
+            for (day, _), summary in zip(to_list, listed):
+                days[day] = summary
+            for summary in undated_listed:
+                merge_summary(undated, summary)
+        return {
+            'days': days,
+            'undated': undated,
+            'listed': [day for day, _ in to_list],
+            'settled': [day for day, _ in to_list if day < cutoff]
+        }
+
+
+def partition_value(value):
+    """Partition key component that is safe in S3 keys and Hive-style paths"""
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', str(value or 'Unknown')).strip('_') or 'Unknown'
+
+
+class _PartFile:
+    """Gzip NDJSON part file being written for one partition, spooled to disk when large"""
+
+    def __init__(self, partition, first_id, spool_bytes):
+        self.partition = partition
+        self.first_id = first_id
+        self.records = 0
+        self.raw = tempfile.SpooledTemporaryFile(max_size=spool_bytes)
+        # mtime=0 keeps the bytes of a re-exported part identical
+        self.gzip = gzip.GzipFile(fileobj=self.raw, mode='wb', mtime=0)
+
+    def write(self, line):
+        self.gzip.write(line)
+        self.records += 1
+
+    def compressed_size(self):
+        return self.raw.tell()
+
+    def finish(self):
+        self.gzip.close()
+        size = self.raw.tell()
+        self.raw.seek(0)
+        return self.raw, size
+
+
+class SensorExporter:
+    """Export ``sensors`` readings to the data lake as time-partitioned gzip NDJSON.
+
+    Readings are read in ``_id`` order after the export's watermark and
+    written to one part file per ``region/date/hour`` partition. A part is
+    uploaded once it reaches ``target_bytes`` compressed, or when more than
+    ``max_open_files`` partitions are open (oldest first), or at the end of
+    the run. Part keys are named after their first reading's ``_id``, so a
+    run that fails before saving the watermark is repeated by overwriting
+    the same keys rather than duplicating them. A lease on the watermark
+    document keeps two runs for the same bucket from exporting at once.
+    """
+
+    def __init__(self, s3, prefix=EXPORT_PREFIX, target_bytes=None, max_open_files=None,
+                 batch_size=None, lag_seconds=None, spool_bytes=None, lease_seconds=None):
+        self.s3 = s3
+        self.prefix = prefix
+        self.target_bytes = target_bytes or Config.EXPORT_TARGET_FILE_BYTES
+        self.max_open_files = max_open_files or Config.EXPORT_MAX_OPEN_FILES
+        self.batch_size = batch_size or Config.EXPORT_BATCH_SIZE
+        self.lag_seconds = lag_seconds if lag_seconds is not None else Config.EXPORT_LAG_SECONDS
+        self.spool_bytes = spool_bytes or Config.EXPORT_SPOOL_BYTES
+        self.lease_seconds = lease_seconds or Config.EXPORT_LEASE_SECONDS
+
+    def partition(self, reading):
+        """``region=<r>/date=<YYYY-MM-DD>/hour=<HH>`` partition of a reading"""
+        from models import reading_time
+        when = reading_time(reading)
+        return f"region={partition_value(reading.get('location'))}/date={when:%Y-%m-%d}/hour={when:%H}"
+
+    def part_key(self, part):
+        return f"{self.prefix}{part.partition}/part-{part.first_id}.ndjson.gz"
+
+    def upload(self, bucket, part, stats):
+        body, size = part.finish()
+        try:
+            self.s3.upload_fileobj(body, bucket, self.part_key(part), ExtraArgs={
+                'ContentType': 'application/x-ndjson',
+                'Metadata': {'records': str(part.records), 'source': 'gppnn-system'}
+            })
+        finally:
+            body.close()
+        stats['files'] += 1
+        stats['bytes'] += size
+
+    def export(self, bucket, name=None, limit=None):
+        """Export readings stored since the last run; returns run statistics.
+
+        Readings newer than ``lag_seconds`` are left for the next run so
+        that in-flight inserts with earlier ``_id`` values are not skipped.
+        While another run holds the lease nothing is exported and the
+        status is ``in_progress``.
+        """
+        from models import mongodb
+        name = name or f"sensors:{bucket}"
+        started = time.monotonic()
+        owner = uuid.uuid4().hex
+        watermark = mongodb.acquire_export_lease(name, owner, self.lease_seconds)
+        if watermark is None:
+            held = mongodb.get_export_watermark(name) or {}
+            return {'name': name, 'status': 'in_progress', 'lease_until': held.get('lease_until')}
+        try:
+            return self._export(bucket, name, owner, watermark, limit, started)
+        except Exception:
+            mongodb.release_export_lease(name, owner)
+            raise
+
+    def _export(self, bucket, name, owner, watermark, limit, started):
+        from models import mongodb
+
+        def flush(part):
+            self.upload(bucket, part, stats)
+            mongodb.renew_export_lease(name, owner, self.lease_seconds)
+
+        id_range = {'$lt': ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(seconds=self.lag_seconds))}
+        if watermark.get('last_id') is not None:
+            id_range['$gt'] = watermark['last_id']
+        cursor = mongodb.sensors.find({'_id': id_range}, {'geo': 0}).sort('_id', 1).batch_size(self.batch_size)
+        if limit:
+            cursor = cursor.limit(limit)
+
+        stats = {'name': name, 'records': 0, 'files': 0, 'bytes': 0, 'partitions': set()}
+        open_parts = {}
+        last_id = None
+        try:
+            for reading in cursor:
+                partition = self.partition(reading)
+                part = open_parts.get(partition)
+                if part is None:
+                    if len(open_parts) >= self.max_open_files:
+                        flush(open_parts.pop(next(iter(open_parts))))
+                    part = open_parts[partition] = _PartFile(partition, reading['_id'], self.spool_bytes)
+                line = json.dumps(reading, default=MongoJSONProvider.default, separators=(',', ':'))
+                part.write(line.encode('utf-8') + b'\n')
+                if part.compressed_size() >= self.target_bytes:
+                    flush(open_parts.pop(partition))
+                stats['records'] += 1
+                stats['partitions'].add(partition)
+                last_id = reading['_id']
+            for partition in list(open_parts):
+                flush(open_parts.pop(partition))
+        finally:
+            for part in open_parts.values():
+                part.raw.close()
+
+        if last_id is not None:
+            mongodb.set_export_watermark(name, owner, last_id, stats['records'])
+        else:
+            mongodb.release_export_lease(name, owner)
+        stats['partitions'] = len(stats['partitions'])
+        stats['watermark'] = str(last_id or watermark.get('last_id') or '') or None
+        stats['duration_seconds'] = round(time.monotonic() - started, 2)
+        return stats
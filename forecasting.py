@@ -0,0 +1,254 @@
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from config import Config
+
+# AquaPulse - Local per-region pollution forecasting
+
+# Identifier stored with materialized predictions
+MODEL_ID = 'holt-linear'
+
+# Smoothing parameter grid searched when a region is first fitted
+ALPHA_GRID = (0.2, 0.4, 0.6, 0.8)
+BETA_GRID = (0.05, 0.1, 0.2, 0.3)
+
+# Pollution levels are reported on a 0-10 scale
+LEVEL_MIN = 0.0
+LEVEL_MAX = 10.0
+
+# Observation time of a reading: its own timestamp (a date or an ISO string),
+# falling back to when it was stored
+OBSERVED_AT = {
+    '$cond': [
+        {'$eq': [{'$type': '$timestamp'}, 'date']},
+        '$timestamp',
+        {'$dateFromString': {'dateString': '$timestamp', 'onError': '$stored_at', 'onNull': '$stored_at'}}
+    ]
+}
+
+
+def _clamp(value):
+    return max(LEVEL_MIN, min(LEVEL_MAX, value))
+
+
+def trend_label(current_level, predicted_level):
+    """Classify a forecast against the current level with a 5% dead band"""
+    if predicted_level > current_level * 1.05:
+        return 'increasing'
+    if predicted_level < current_level * 0.95:
+        return 'decreasing'
+    return 'stable'
+
+
+def interval_confidence(low, high):
+    """Confidence score (0-100): narrower intervals on the 0-10 scale score higher"""
+    return round(100 * (1 - min(1.0, (high - low) / (LEVEL_MAX - LEVEL_MIN))), 1)
+
+
+class HoltState:
+    """Fitted Holt linear-trend model for one region's daily mean levels"""
+
+    __slots__ = ('alpha', 'beta', 'level', 'trend', 'last_day', 'observations', 'sse', 'errors')
+
+    def __init__(self, alpha, beta, level, trend, last_day):
+        self.alpha = alpha
+        self.beta = beta
+        self.level = level
+        self.trend = trend
+        self.last_day = last_day
+        self.observations = 1
+        self.sse = 0.0
+        self.errors = 0
+
+    def update(self, day, value):
+        """Fold in the mean for ``day``, bridging any missing days along the trend"""
+        steps = max(1, (day - self.last_day).days)
+        forecast = self.level + steps * self.trend
+        error = value - forecast
+        previous_level = self.level
+        self.level = self.alpha * value + (1 - self.alpha) * forecast
+        self.trend = self.beta * (self.level - previous_level) / steps + (1 - self.beta) * self.trend
+        self.last_day = day
+        self.observations += 1
+        self.sse += error * error
+        self.errors += 1
+
+    def forecast(self, horizon):
+        """Point forecast ``horizon`` days after ``last_day``"""
+        return self.level + horizon * self.trend
+
+    def stderr(self, horizon):
+        """Standard error of the ``horizon``-step forecast (Holt's analytic variance)"""
+        if self.errors < 2:
+            return None
+        sigma2 = self.sse / (self.errors - 1)
+        spread = sum((self.alpha * (1 + j * self.beta)) ** 2 for j in range(1, horizon))
+        return math.sqrt(sigma2 * (1 + spread))
+
+    def copy(self):
+        clone = HoltState(self.alpha, self.beta, self.level, self.trend, self.last_day)
+        clone.observations = self.observations
+        clone.sse = self.sse
+        clone.errors = self.errors
+        return clone
+
+    @classmethod
+    def fit(cls, points, alpha=None, beta=None):
+        """Fit to ``[(day, value), ...]`` in day order, grid-searching alpha/beta by one-step SSE"""
+        alphas = (alpha,) if alpha is not None else ALPHA_GRID
+        betas = (beta,) if beta is not None else BETA_GRID
+        best = None
+        for a in alphas:
+            for b in betas:
+                state = cls._run(points, a, b)
+                if best is None or state.sse < best.sse:
+                    best = state
+        return best
+
+    @classmethod
+    def _run(cls, points, alpha, beta):
+        (first_day, first_value) = points[0]
+        trend = 0.0
+        if len(points) > 1:
+            (second_day, second_value) = points[1]
+            trend = (second_value - first_value) / max(1, (second_day - first_day).days)
+        state = cls(alpha, beta, first_value, trend, first_day)
+        for day, value in points[1:]:
+            state.update(day, value)
+        return state
+
+
+class ForecastEngine:
+    """Per-region Holt forecasts over daily mean sensor levels.
+
+    Regions are fitted once from ``history_days`` of readings. After that,
+    ``refresh`` only aggregates days newer than each region's last complete
+    day and folds them into the stored state. The current (partial) day is
+    applied to a copy at forecast time, so later readings for today are not
+    counted twice. Forecasting from fitted state is O(1) per region.
+    """
+
+    def __init__(self, history_days=None, refresh_interval=None, z=1.96):
+        self.history_days = history_days or Config.FORECAST_HISTORY_DAYS
+        self.refresh_interval = refresh_interval if refresh_interval is not None else Config.FORECAST_REFRESH_INTERVAL
+        self.z = z
+        self._lock = threading.Lock()
+        self._states = {}
+        self._partial = {}
+        self._refreshed_at = None
+        self._committed_through = None
+
+    def daily_means_pipeline(self, since):
+        """Aggregation producing one ``{region, day, mean, count}`` row per region and day"""
+        return [
+            # Cheap prefilter on either time field; ISO strings compare in date order
+            {'$match': {'$or': [
+                {'stored_at': {'$gte': since}},
+                {'timestamp': {'$gte': since}},
+                {'timestamp': {'$gte': since.isoformat()}}
+            ]}},
+            {'$project': {'location': 1, 'pollution_level': 1, 'observed_at': OBSERVED_AT}},
+            {'$match': {'observed_at': {'$gte': since}, 'pollution_level': {'$type': 'number'}}},
+            {'$group': {
+                '_id': {
+                    'region': {'$ifNull': ['$location', 'Unknown']},
+                    'day': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$observed_at'}}
+                },
+                'mean': {'$avg': '$pollution_level'},
+                'count': {'$sum': 1}
+            }},
+            {'$sort': {'_id.day': 1}}
+        ]
+
+    def load_daily_means(self, since):
+        """Return ``{region: [(day, mean), ...]}`` in day order for readings since ``since``"""
+        from models import mongodb
+        series = {}
+        for row in mongodb.sensors.aggregate(self.daily_means_pipeline(since), allowDiskUse=True):
+            day = datetime.strptime(row['_id']['day'], '%Y-%m-%d')
+            series.setdefault(row['_id']['region'], []).append((day, row['mean']))
+        return series
+
+    def ingest(self, series, today=None):
+        """Fold daily means into the fitted states.
+
+        Complete days update (or initially fit) each region's state; ``today``
+        is kept aside as a partial observation.
+        """
+        today = today or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        with self._lock:
+            for region, points in series.items():
+                complete = [(day, value) for day, value in points if day < today]
+                partial = [value for day, value in points if day == today]
+                state = self._states.get(region)
+                if state is None:
+                    if complete:
+                        self._states[region] = HoltState.fit(complete)
+                else:
+                    for day, value in complete:
+                        if day > state.last_day:
+                            state.update(day, value)
+                if partial:
+                    self._partial[region] = (today, partial[-1])
+                else:
+                    self._partial.pop(region, None)
+            self._committed_through = today
+
+    def refresh(self, force=False):
+        """Pull readings newer than the fitted state, at most once per ``refresh_interval``"""
+        now = time.monotonic()
+        if not force and self._refreshed_at is not None and now - self._refreshed_at < self.refresh_interval:
+            return
+        self._refreshed_at = now
+        try:
+            if self._committed_through is None:
+                since = datetime.now() - timedelta(days=self.history_days)
+            else:
+                since = self._committed_through
+            self.ingest(self.load_daily_means(since))
+        except Exception as e:
+            print(f"Error refreshing forecast models: {e}")
+
+    def forecast(self, region, horizons=(7, 30)):
+        """Forecast ``region`` at each horizon (days from today).
+
+        Returns None when the region has no fitted history, otherwise
+        ``{'model', 'observations', 'horizons': {h: (point, low, high)}}`` with
+        values clamped to the 0-10 pollution scale.
+        """
+        with self._lock:
+            state = self._states.get(region)
+            if state is None:
+                return None
+            state = state.copy()
+            partial = self._partial.get(region)
+        if partial:
+            state.update(*partial)
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        offset = max(0, (today - state.last_day).days)
+        result = {}
+        for horizon in horizons:
+            steps = horizon + offset
+            point = state.forecast(steps)
+            stderr = state.stderr(steps)
+            if stderr is None:
+                low, high = LEVEL_MIN, LEVEL_MAX
+            else:
+                low, high = point - self.z * stderr, point + self.z * stderr
+            result[horizon] = (_clamp(point), _clamp(low), _clamp(high))
+        return {
+            'model': f"holt(alpha={state.alpha}, beta={state.beta})",
+            'model_id': MODEL_ID,
+            'params': {'alpha': state.alpha, 'beta': state.beta},
+            'observations': state.observations,
+            'horizons': result
+        }
+
+    def regions(self):
+        with self._lock:
+            return list(self._states)
+
+
+# Initialize forecasting engine
+forecast_engine = ForecastEngine()
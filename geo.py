@@ -0,0 +1,235 @@
+import math
+from config import Config
+
+# AquaPulse - Geohash and spatial clustering helpers for sensor locations
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_INDEX = {char: i for i, char in enumerate(GEOHASH_ALPHABET)}
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def valid_coordinates(lat, lng):
+    """Whether ``lat``/``lng`` are numbers within WGS84 bounds"""
+    try:
+        return -90 <= float(lat) <= 90 and -180 <= float(lng) <= 180
+    except (TypeError, ValueError):
+        return False
+
+
+def encode_geohash(lat, lng, precision=None):
+    """Geohash of a point; longer hashes name smaller cells"""
+    precision = precision or Config.GEOHASH_PRECISION
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_range[0] + lng_range[1]) / 2
+            if lng >= mid:
+                value = value * 2 + 1
+                lng_range[0] = mid
+            else:
+                value *= 2
+                lng_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if lat >= mid:
+                value = value * 2 + 1
+                lat_range[0] = mid
+            else:
+                value *= 2
+                lat_range[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+def geohash_bounds(geohash):
+    """``(south, west, north, east)`` of a geohash cell"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = GEOHASH_INDEX[char]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            target = lng_range if even else lat_range
+            mid = (target[0] + target[1]) / 2
+            target[1 - bit] = mid
+            even = not even
+    return lat_range[0], lng_range[0], lat_range[1], lng_range[1]
+
+
+def geohash_center(geohash):
+    """``(lat, lng)`` at the centre of a geohash cell"""
+    south, west, north, east = geohash_bounds(geohash)
+    return (south + north) / 2, (west + east) / 2
+
+
+def geo_point(lat, lng):
+    """GeoJSON point for a ``2dsphere`` index (longitude first)"""
+    return {'type': 'Point', 'coordinates': [float(lng), float(lat)]}
+
+
+def bbox_polygon(south, west, north, east):
+    """GeoJSON polygon covering a bounding box, for ``$geoWithin`` queries"""
+    return {'type': 'Polygon', 'coordinates': [[
+        [west, south], [east, south], [east, north], [west, north], [west, south]
+    ]]}
+
+
+def bbox_filter(south, west, north, east, field='geo'):
+    """``$geoWithin`` filter for a map viewport.
+
+    Longitudes are wrapped into [-180, 180], so viewports that cross the
+    antimeridian become two boxes. Boxes are split into pieces at most 90
+    degrees wide: GeoJSON polygon edges follow great circles, which become
+    ambiguous at 180 degrees and bow towards the poles as boxes widen.
+    """
+    south, north = max(-90.0, min(south, north)), min(90.0, max(south, north))
+    if east - west >= 360:
+        west, east = -180.0, 180.0
+    else:
+        west = (west + 180) % 360 - 180
+        east = (east + 180) % 360 - 180
+    spans = [(west, east)] if west < east else [(west, 180.0), (-180.0, east)]
+    boxes = []
+    for span_west, span_east in spans:
+        while span_east - span_west > 90:
+            boxes.append((span_west, span_west + 90))
+            span_west += 90
+        boxes.append((span_west, span_east))
+    clauses = [{field: {'$geoWithin': {'$geometry': bbox_polygon(south, w, north, e)}}} for w, e in boxes]
+    return clauses[0] if len(clauses) == 1 else {'$or': clauses}
+
+
+def geohash_precision_for_zoom(zoom):
+    """Geohash length whose cells are roughly 32-64 pixels wide at a web map ``zoom``"""
+    # A precision-p geohash splits longitude into 2 ** ((5p + 1) // 2) columns,
+    # and a zoom-z map is 256 * 2 ** z pixels around
+    for precision in range(1, 13):
+        if (5 * precision + 1) // 2 >= zoom + 3:
+            return precision
+    return 12
+
+
+def spatial_fields(document):
+    """``geo`` and ``geohash`` for a document with ``lat``/``lng``, or {} if it has none"""
+    lat, lng = document.get('lat'), document.get('lng')
+    if not valid_coordinates(lat, lng):
+        return {}
+    return {'geo': geo_point(lat, lng), 'geohash': encode_geohash(float(lat), float(lng))}
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class _Grid:
+    """Uniform lat/lng grid with cells ``eps_km`` tall for fixed-radius neighbour lookups"""
+
+    def __init__(self, points, eps_km):
+        self.points = points
+        self.eps_km = eps_km
+        self.cell = eps_km / KM_PER_DEGREE
+        self.columns = max(1, math.ceil(360 / self.cell))
+        self.cells = {}
+        for i, (lat, lng) in enumerate(points):
+            self.cells.setdefault(self._key(lat, lng), []).append(i)
+
+    def _key(self, lat, lng):
+        return math.floor(lat / self.cell), math.floor((lng + 180) / self.cell) % self.columns
+
+    def neighbours(self, i):
+        lat, lng = self.points[i]
+        row, column = self._key(lat, lng)
+        # Cells narrow towards the poles, so search further east and west there
+        cos_lat = max(math.cos(math.radians(min(90.0, abs(lat) + self.cell))), 1e-6)
+        span = min(self.columns // 2, math.ceil(1 / cos_lat))
+        columns = {(column + d_column) % self.columns for d_column in range(-span, span + 1)}
+        found = []
+        for d_row in (-1, 0, 1):
+            for other_column in columns:
+                for j in self.cells.get((row + d_row, other_column), ()):
+                    other_lat, other_lng = self.points[j]
+                    if haversine_km(lat, lng, other_lat, other_lng) <= self.eps_km:
+                        found.append(j)
+        return found
+
+
+def dbscan(points, eps_km=None, min_samples=None):
+    """DBSCAN over ``[(lat, lng), ...]`` with a grid index for neighbour queries.
+
+    Returns one label per point: a cluster number from 0, or -1 for noise.
+    Each neighbour query only inspects nearby grid cells, so the cost grows
+    with local density rather than with the number of points.
+    """
+    eps_km = eps_km or Config.HOTSPOT_CLUSTER_EPS_KM
+    min_samples = min_samples or Config.HOTSPOT_CLUSTER_MIN_SAMPLES
+    grid = _Grid(points, eps_km)
+    labels = [None] * len(points)
+    cluster = -1
+    for i in range(len(points)):
+        if labels[i] is not None:
+            continue
+        neighbours = grid.neighbours(i)
+        if len(neighbours) < min_samples:
+            labels[i] = -1
+            continue
+        cluster += 1
+        labels[i] = cluster
+        frontier = [j for j in neighbours if j != i]
+        while frontier:
+            j = frontier.pop()
+            if labels[j] == -1:
+                labels[j] = cluster
+            if labels[j] is not None:
+                continue
+            labels[j] = cluster
+            expansion = grid.neighbours(j)
+            if len(expansion) >= min_samples:
+                frontier.extend(expansion)
+    return labels
+
+
+def cluster_hotspots(sensors, eps_km=None, min_samples=None):
+    """Group nearby sensor readings into density clusters, largest peak first"""
+    located = [s for s in sensors if valid_coordinates(s.get('lat'), s.get('lng'))]
+    labels = dbscan([(float(s['lat']), float(s['lng'])) for s in located], eps_km, min_samples)
+    members = {}
+    for sensor, label in zip(located, labels):
+        if label >= 0:
+            members.setdefault(label, []).append(sensor)
+    clusters = []
+    for label, group in members.items():
+        lats = [float(s['lat']) for s in group]
+        lngs = [float(s['lng']) for s in group]
+        levels = [s.get('pollution_level', 0) for s in group]
+        centroid_lat, centroid_lng = sum(lats) / len(lats), sum(lngs) / len(lngs)
+        clusters.append({
+            'cluster_id': label,
+            'size': len(group),
+            'centroid': {'lat': round(centroid_lat, 4), 'lng': round(centroid_lng, 4)},
+            'bbox': [min(lngs), min(lats), max(lngs), max(lats)],
+            'geohash': encode_geohash(centroid_lat, centroid_lng, 5),
+            'max_pollution_level': max(levels),
+            'mean_pollution_level': round(sum(levels) / len(levels), 2),
+            'sensor_ids': [s.get('id') for s in group],
+            'locations': sorted({s.get('location', 'Unknown') for s in group})
+        })
+    clusters.sort(key=lambda c: (c['max_pollution_level'], c['size']), reverse=True)
+    return clusters
@@ -0,0 +1,130 @@
+import atexit
+import queue
+import threading
+import time
+from config import Config
+
+# AquaPulse - Background micro-batching ingestion for IoT sensor readings
+
+class SensorIngestionQueue:
+    """Bounded buffer that flushes sensor readings to MongoDB in micro-batches.
+
+    Request handlers call ``enqueue`` and return immediately; a single worker
+    thread flushes to ``mongodb.sensors`` once ``batch_size`` readings are
+    buffered or ``flush_interval`` seconds have passed since the last flush.
+    """
+
+    def __init__(self, maxsize=None, batch_size=None, flush_interval=None):
+        self.maxsize = maxsize or Config.INGEST_QUEUE_MAXSIZE
+        self.batch_size = batch_size or Config.INGEST_BATCH_SIZE
+        self.flush_interval = flush_interval or Config.INGEST_FLUSH_INTERVAL
+        self._queue = queue.Queue(maxsize=self.maxsize)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._worker = None
+        self.stats = {'enqueued': 0, 'rejected': 0, 'inserted': 0, 'duplicates': 0, 'errors': 0, 'flushes': 0}
+
+    def start(self):
+        """Start the flush worker if it is not already running"""
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._stop.clear()
+                self._worker = threading.Thread(target=self._run, name='sensor-ingestion', daemon=True)
+                self._worker.start()
+
+    def enqueue(self, readings, block=False, timeout=None):
+        """Buffer readings for the worker.
+
+        Returns the number of readings accepted. When the buffer is full the
+        remaining readings are rejected (``block=False``) or the caller waits up
+        to ``timeout`` seconds for space, which applies backpressure upstream.
+        """
+        if self._stop.is_set():
+            return 0
+        readings = list(readings)
+        self.start()
+        accepted = 0
+        for reading in readings:
+            try:
+                # Copy so later mutations by the caller never race with the writer
+                self._queue.put(dict(reading), block=block, timeout=timeout)
+                accepted += 1
+            except queue.Full:
+                break
+        rejected = len(readings) - accepted
+        self._count(enqueued=accepted, rejected=rejected)
+        if rejected:
+            print(f"Sensor ingestion queue full, rejected {rejected} readings")
+        return accepted
+
+    def pending(self):
+        """Approximate number of readings waiting to be flushed"""
+        return self._queue.qsize()
+
+    def snapshot_stats(self):
+        """Consistent copy of the counters"""
+        with self._lock:
+            return dict(self.stats)
+
+    def _count(self, **increments):
+        # Request threads and the worker both update the counters
+        with self._lock:
+            for name, amount in increments.items():
+                self.stats[name] += amount
+
+    def _drain_batch(self, wait):
+        batch = []
+        deadline = time.monotonic() + wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        try:
+            from models import mongodb
+            result = mongodb.store_sensor_data_bulk(batch, batch_size=self.batch_size)
+            self._count(inserted=result['inserted'], duplicates=result['duplicates'], errors=result['errors'])
+        except Exception as e:
+            print(f"Error flushing sensor ingestion batch: {e}")
+            self._count(errors=len(batch))
+        finally:
+            self._count(flushes=1)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._flush(self._drain_batch(self.flush_interval))
+        # Drain whatever is still buffered before the worker exits
+        while True:
+            batch = self._drain_batch(0)
+            if not batch:
+                break
+            self._flush(batch)
+
+    def shutdown(self, timeout=10):
+        """Stop accepting readings and flush everything still buffered"""
+        self._stop.set()
+        worker = self._worker
+        if worker is not None and worker.is_alive():
+            worker.join(timeout)
+        else:
+            while True:
+                batch = self._drain_batch(0)
+                if not batch:
+                    break
+                self._flush(batch)
+
+
+# Initialize ingestion queue
+sensor_ingestion = SensorIngestionQueue()
+atexit.register(sensor_ingestion.shutdown)
@@ -0,0 +1,88 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+
+# AquaPulse - Background job execution for slow AI calls and backups
+
+class BackgroundJobs:
+    """Run slow calls on a bounded thread pool behind pollable job ids.
+
+    Jobs submitted with the same ``key`` while one is still running share a
+    job id, so repeated page loads do not queue duplicate work. Once a job
+    has finished, the next submission for its key starts a new job; results
+    are never reused from here. Finished jobs stay pollable by id until
+    ``retention`` seconds after they were submitted.
+    """
+
+    def __init__(self, max_workers=None, timeout=None, retention=None, name='ai-job'):
+        self.timeout = timeout or Config.AI_JOB_TIMEOUT
+        self.retention = retention or Config.AI_JOB_RETENTION
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or Config.AI_JOB_WORKERS,
+            thread_name_prefix=name
+        )
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._keys = {}
+
+    def submit(self, fn, *args, key=None, **kwargs):
+        """Schedule ``fn`` and return its job id"""
+        with self._lock:
+            self._prune()
+            if key is not None and key in self._keys:
+                running = self._jobs.get(self._keys[key])
+                if running is not None and not running['future'].done():
+                    return self._keys[key]
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'future': self._executor.submit(fn, *args, **kwargs),
+                'key': key,
+                'submitted_at': time.monotonic()
+            }
+            if key is not None:
+                self._keys[key] = job_id
+            return job_id
+
+    def status(self, job_id):
+        """Return ``{'status': ...}`` with the result once the job is done.
+
+        Status is one of ``pending``, ``done``, ``failed``, ``timeout`` or
+        ``unknown``.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return {'job_id': job_id, 'status': 'unknown'}
+        future = job['future']
+        if not future.done():
+            if time.monotonic() - job['submitted_at'] > self.timeout:
+                return {'job_id': job_id, 'status': 'timeout'}
+            return {'job_id': job_id, 'status': 'pending'}
+        error = future.exception()
+        if error is not None:
+            return {'job_id': job_id, 'status': 'failed', 'error': str(error)}
+        return {'job_id': job_id, 'status': 'done', 'result': future.result()}
+
+    def _prune(self):
+        now = time.monotonic()
+        for job_id, job in list(self._jobs.items()):
+            if not job['future'].done():
+                continue
+            if self._keys.get(job['key']) == job_id:
+                del self._keys[job['key']]
+            if now - job['submitted_at'] > self.retention:
+                del self._jobs[job_id]
+
+
+# Initialize AI job runner
+ai_jobs = BackgroundJobs()
+
+# Whole-bucket backups run for far longer than any HTTP request
+backup_jobs = BackgroundJobs(
+    max_workers=Config.BACKUP_JOB_WORKERS,
+    timeout=Config.BACKUP_JOB_TIMEOUT,
+    retention=Config.BACKUP_JOB_RETENTION,
+    name='backup-job'
+)
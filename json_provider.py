@@ -0,0 +1,78 @@
+import json
+import bson
+from datetime import date, datetime
+from decimal import Decimal
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from flask.json.provider import DefaultJSONProvider
+from config import Config
+
+try:
+    import orjson
+except ImportError:  # optional fast encoder
+    orjson = None
+
+# AquaPulse - JSON encoding for MongoDB documents
+
+class MongoJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes MongoDB values in a single pass.
+
+    ``ObjectId`` becomes its hex string, datetimes use ISO 8601 and
+    ``Decimal128`` is encoded like ``Decimal``. When orjson is installed and
+    ``JSON_ENCODER_BACKEND`` allows it, encoding is done by orjson with the
+    same fallbacks; otherwise the standard library encoder is used.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        backend = Config.JSON_ENCODER_BACKEND
+        self.use_orjson = orjson is not None and backend in ('auto', 'orjson')
+        if backend == 'orjson' and orjson is None:
+            print("Warning: JSON_ENCODER_BACKEND=orjson but orjson is not installed, using json")
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, ObjectId):
+            return str(o)
+        if isinstance(o, (datetime, date)):
+            return o.isoformat()
+        if isinstance(o, Decimal128):
+            return str(o.to_decimal())
+        if isinstance(o, Decimal):
+            return str(o)
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        if self.use_orjson and set(kwargs) <= {'default', 'sort_keys', 'indent', 'separators', 'ensure_ascii'}:
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS
+            if kwargs.get('sort_keys', self.sort_keys):
+                option |= orjson.OPT_SORT_KEYS
+            if kwargs.get('indent'):
+                option |= orjson.OPT_INDENT_2
+            try:
+                return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode('utf-8')
+            except TypeError:
+                # e.g. integers beyond 64 bits; the standard encoder handles them
+                pass
+        kwargs.setdefault('default', self.default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def iter_raw_batches(self, batches):
+        """Encode raw BSON batches (from ``find_raw_batches``) as chunks of one JSON array.
+
+        Each batch is decoded by the bson C extension in a single call and
+        encoded in a single ``dumps``, so no per-document work happens in
+        Python and only one batch is held in memory at a time.
+        """
+        yield '['
+        first = True
+        for batch in batches:
+            documents = bson.decode_all(batch)
+            if not documents:
+                continue
+            chunk = self.dumps(documents)[1:-1]
+            yield chunk if first else ',' + chunk
+            first = False
+        yield ']'
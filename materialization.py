@@ -0,0 +1,145 @@
+import atexit
+import threading
+import time
+from datetime import datetime, timedelta
+from config import Config
+from forecasting import forecast_engine, trend_label, interval_confidence
+
+# AquaPulse - Scheduled materialization of regional predictions
+
+def describe_run(run, now=None):
+    """Version, model and staleness of a published prediction run"""
+    if not run:
+        return {'version': None, 'model_id': None, 'generated_at': None, 'age_seconds': None, 'stale': True}
+    now = now or datetime.now()
+    age = (now - run['generated_at']).total_seconds()
+    return {
+        'version': run['version'],
+        'model_id': run['model_id'],
+        'generated_at': run['generated_at'],
+        'age_seconds': round(age, 1),
+        'stale': age > Config.PREDICTION_MAX_AGE
+    }
+
+
+def dashboard_predictions(documents):
+    """Fold per-horizon prediction documents into the per-region dashboard format"""
+    by_region = {}
+    for document in documents:
+        entry = by_region.setdefault(document['region'], {
+            'region': document['region'],
+            'current_level': round(document['current_level'], 1),
+            'model': document['model_id'],
+            'version': document['version']
+        })
+        horizon = document['horizon_days']
+        entry[f'predicted_{horizon}days'] = round(document['predicted_level'], 1)
+        entry[f'interval_{horizon}days'] = [round(document['interval_low'], 1), round(document['interval_high'], 1)]
+        if horizon == 7:
+            entry['trend'] = document['trend']
+            entry['confidence'] = document['confidence']
+    return list(by_region.values())
+
+
+class PredictionMaterializer:
+    """Periodically forecast every region and publish the results as a new version.
+
+    Each run refreshes the forecasting engine, writes one document per region
+    and horizon to ``predictions`` tagged with the run's version, and then
+    publishes the run in ``prediction_runs``. API reads serve the latest
+    published run instead of forecasting on the request path.
+    """
+
+    def __init__(self, interval=None, horizons=None):
+        self.interval = interval or Config.PREDICTION_JOB_INTERVAL
+        self.horizons = tuple(horizons or Config.PREDICTION_HORIZONS)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._worker = None
+        self.stats = {'runs': 0, 'documents': 0, 'errors': 0, 'last_duration': None}
+
+    def start(self):
+        """Start the scheduler thread if it is not already running"""
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._stop.clear()
+                self._worker = threading.Thread(target=self._run, name='prediction-materializer', daemon=True)
+                self._worker.start()
+
+    def build_documents(self, version, generated_at):
+        """Prediction documents for every fitted region at each configured horizon"""
+        today = generated_at.replace(hour=0, minute=0, second=0, microsecond=0)
+        documents = []
+        for region in forecast_engine.regions():
+            forecast = forecast_engine.forecast(region, horizons=(0,) + self.horizons)
+            if forecast is None:
+                continue
+            current_level = forecast['horizons'][0][0]
+            for horizon in self.horizons:
+                point, low, high = forecast['horizons'][horizon]
+                documents.append({
+                    'region': region,
+                    'model_id': forecast['model_id'],
+                    'model_params': forecast['params'],
+                    'horizon_days': horizon,
+                    'version': version,
+                    'generated_at': generated_at,
+                    'target_date': today + timedelta(days=horizon),
+                    'current_level': current_level,
+                    'predicted_level': point,
+                    'interval_low': low,
+                    'interval_high': high,
+                    'confidence': interval_confidence(low, high),
+                    'trend': trend_label(current_level, point),
+                    'observations': forecast['observations']
+                })
+        return documents
+
+    def run_once(self):
+        """Forecast all regions and publish a new prediction version; returns the run or None"""
+        from models import mongodb
+        from cache import dashboard_cache
+        started = time.monotonic()
+        try:
+            forecast_engine.refresh(force=True)
+            generated_at = datetime.now()
+            version = int(generated_at.timestamp() * 1000)
+            documents = self.build_documents(version, generated_at)
+            if not documents:
+                print("Prediction materialization skipped: no fitted regions")
+                return None
+            run = {
+                'version': version,
+                'model_id': documents[0]['model_id'],
+                'generated_at': generated_at,
+                'horizons': list(self.horizons),
+                'regions': len({document['region'] for document in documents}),
+                'documents': len(documents)
+            }
+            self.stats['documents'] += mongodb.store_prediction_run(run, documents)
+            self.stats['runs'] += 1
+            dashboard_cache.invalidate('prediction_data')
+            return run
+        except Exception as e:
+            print(f"Error materializing predictions: {e}")
+            self.stats['errors'] += 1
+            return None
+        finally:
+            self.stats['last_duration'] = round(time.monotonic() - started, 3)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+    def shutdown(self, timeout=10):
+        """Stop the scheduler after the current run"""
+        self._stop.set()
+        worker = self._worker
+        if worker is not None and worker.is_alive():
+            worker.join(timeout)
+
+
+# Initialize prediction materializer
+prediction_materializer = PredictionMaterializer()
+atexit.register(prediction_materializer.shutdown)
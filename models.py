@@ -2,12 +2,419 @@ from pymongo.mongo_client import MongoClient
 from pymongo.server_api import ServerApi
 from datetime import datetime, timedelta
 import json
+import base64
 from bson import ObjectId
 from config import Config
-from pymongo.errors import DuplicateKeyError
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, IndexModel, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from cache import dashboard_cache, SENSOR_CACHE_KEYS, REPORT_CACHE_KEYS
+from geo import spatial_fields, bbox_filter
+from forecasting import OBSERVED_AT
+from timeseries import PERCENTILES, naive_utc, percentile, window_start
 
 # AquaPulse - MongoDB Models for Harmful Algae Bloom Detection
 
+# Pollution levels above ALERT_THRESHOLD open an alert; above HIGH_SEVERITY_THRESHOLD it is high severity
+ALERT_THRESHOLD = 7
+HIGH_SEVERITY_THRESHOLD = 8
+
+# Declarative index registry, applied idempotently by MongoDBManager.ensure_indexes.
+# Each index is matched to the filter and sort of a MongoDBManager read.
+INDEX_REGISTRY = {
+    'sensors': [
+        # get_recent_sensor_data
+        IndexModel([('stored_at', DESCENDING)]),
+        # get_sensor_readings in documents storage mode
+        IndexModel([('id', ASCENDING), ('stored_at', DESCENDING)]),
+        # get_sensor_history by region in documents storage mode
+        IndexModel([('location', ASCENDING), ('stored_at', DESCENDING)]),
+    ],
+    'pollution_reports': [
+        # get_reports_page keyset order, get_pollution_statistics (reports today)
+        IndexModel([('reported_at', DESCENDING), ('_id', DESCENDING)]),
+        # get_citizen_report, update_citizen_report_status
+        IndexModel([('report_id', ASCENDING)]),
+        # get_citizen_reports_by_location
+        IndexModel([('location', ASCENDING), ('timestamp', DESCENDING)]),
+        # get_citizen_reports_by_severity
+        IndexModel([('severity', ASCENDING), ('timestamp', DESCENDING)]),
+        # get_citizen_report_analytics, get_citizen_report_trends date windows
+        IndexModel([('timestamp', DESCENDING)]),
+    ],
+    'sensor_latest': [
+        # find_hotspots_in_bbox, find_hotspots_near, get_sensor_map_view
+        IndexModel([('geo', GEOSPHERE)]),
+        # geohash cell prefix lookups
+        IndexModel([('geohash', ASCENDING)]),
+    ],
+    'predictions': [
+        # get_materialized_predictions, one document per region and horizon per run
+        IndexModel([('version', ASCENDING), ('region', ASCENDING), ('horizon_days', ASCENDING)], unique=True),
+    ],
+    'prediction_runs': [
+        # get_latest_prediction_run
+        IndexModel([('version', DESCENDING)], unique=True),
+    ],
+    'cleanup_logs': [
+        # /api/cleanup-missions active missions
+        IndexModel([('status', ASCENDING)]),
+    ],
+    'alerts': [
+        IndexModel([('alert_id', ASCENDING)], unique=True),
+        # get_active_alerts
+        IndexModel([('status', ASCENDING), ('updated_at', DESCENDING)]),
+    ],
+    'sensor_buckets': [
+        # get_sensor_readings by sensor and time window
+        IndexModel([('sensor_id', ASCENDING), ('bucket_start', ASCENDING)]),
+        # fleet-wide time window scans
+        IndexModel([('bucket_start', ASCENDING)]),
+        # get_sensor_history by region
+        IndexModel([('location', ASCENDING), ('bucket_start', ASCENDING)]),
+    ],
+    'data_lake_days': [
+        # get_data_lake_days, one summary per bucket, prefix and day
+        IndexModel([('bucket', ASCENDING), ('prefix', ASCENDING), ('day', ASCENDING)], unique=True),
+    ],
+    'report_rollups': [
+        # get_citizen_report_trends, daily statistics
+        IndexModel([('granularity', ASCENDING), ('period_start', ASCENDING)]),
+    ],
+    'campaigns': [
+        # get_engagement_campaigns
+        IndexModel([('created_at', DESCENDING)]),
+    ],
+}
+
+# Representative shapes of the indexed reads, checked by MongoDBManager.explain_queries
+QUERY_REGISTRY = [
+    ('get_recent_sensor_data', 'sensors', {}, [('stored_at', DESCENDING)]),
+    ('find_hotspots_in_bbox', 'sensor_latest', bbox_filter(-10, -10, 10, 10), None),
+    ('get_reports_page', 'pollution_reports', {}, [('reported_at', DESCENDING), ('_id', DESCENDING)]),
+    ('reports_today', 'pollution_reports', {'reported_at': {'$gte': datetime(1970, 1, 1)}}, None),
+    ('get_citizen_report', 'pollution_reports', {'report_id': ''}, None),
+    ('get_citizen_reports_by_location', 'pollution_reports', {'location': ''}, [('timestamp', DESCENDING)]),
+    ('get_citizen_reports_by_severity', 'pollution_reports', {'severity': ''}, [('timestamp', DESCENDING)]),
+    ('citizen_report_date_window', 'pollution_reports', {'timestamp': {'$gte': datetime(1970, 1, 1)}}, None),
+    ('active_cleanup_missions', 'cleanup_logs', {'status': 'active'}, None),
+    ('get_materialized_predictions', 'predictions', {'version': 0}, [('region', ASCENDING), ('horizon_days', ASCENDING)]),
+    ('get_latest_prediction_run', 'prediction_runs', {}, [('version', DESCENDING)]),
+    ('get_sensor_readings', 'sensor_buckets', {'sensor_id': '', 'bucket_start': {'$gte': datetime(1970, 1, 1)}}, None),
+    ('get_data_lake_days', 'data_lake_days', {'bucket': '', 'prefix': ''}, None),
+    ('get_alert', 'alerts', {'alert_id': ''}, None),
+    ('get_active_alerts', 'alerts', {'status': 'active'}, [('updated_at', DESCENDING)]),
+    ('get_engagement_campaigns', 'campaigns', {}, [('created_at', DESCENDING)]),
+]
+
+# Embedded payloads on report documents that list views never render
+REPORT_PAYLOAD_FIELDS = ('image_analysis', 'transcription', 'speakers', 'audio_metadata', 'ai_analysis', 'user_input')
+
+
+def resolve_projection(projection):
+    """Normalize a projection given as None (whole documents), a dict, or field names"""
+    if projection is None or isinstance(projection, dict):
+        return projection
+    if isinstance(projection, str):
+        projection = [projection]
+    return {field: 1 for field in projection}
+
+
+def exclude_fields(*fields):
+    """Projection that drops ``fields`` and keeps everything else"""
+    return {field: 0 for field in fields}
+
+
+def _projection_keeping(projection, *fields):
+    """Adjust ``projection`` so ``fields`` are always returned"""
+    projection = resolve_projection(projection)
+    if not projection:
+        return projection
+    projection = dict(projection)
+    inclusive = any(value for key, value in projection.items() if key != '_id')
+    for field in fields:
+        if inclusive or field == '_id':
+            projection[field] = 1
+        else:
+            projection.pop(field, None)
+    return projection
+
+
+# Measurements copied into hourly sensor buckets
+SENSOR_BUCKET_FIELDS = ('pollution_level', 'microplastics', 'temperature', 'turbidity')
+
+
+def reading_time(reading):
+    """Observation time of a sensor reading: its timestamp, else when it was stored"""
+    value = reading.get('timestamp')
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            value = None
+    if isinstance(value, datetime):
+        return naive_utc(value)
+    return reading.get('stored_at') or datetime.now()
+
+
+def sensor_bucket_updates(readings, max_readings=None):
+    """Upserts appending ``readings`` to per-sensor hourly bucket documents.
+
+    Readings for the same sensor and hour are pushed in one update. A bucket
+    only accepts pushes while it has room, so a full hour spills into a
+    further bucket document with the same ``bucket_start``.
+    """
+    max_readings = max_readings or Config.SENSOR_BUCKET_MAX_READINGS
+    grouped = {}
+    for reading in readings:
+        if reading.get('id') is None:
+            continue
+        at = reading_time(reading)
+        key = (reading['id'], at.replace(minute=0, second=0, microsecond=0))
+        grouped.setdefault(key, []).append((at, reading))
+    operations = []
+    for (sensor_id, bucket_start), entries in grouped.items():
+        for start in range(0, len(entries), max_readings):
+            chunk = entries[start:start + max_readings]
+            samples = []
+            levels = []
+            for at, reading in chunk:
+                sample = {'t': at}
+                sample.update({field: reading[field] for field in SENSOR_BUCKET_FIELDS if field in reading})
+                samples.append(sample)
+                if isinstance(reading.get('pollution_level'), (int, float)):
+                    levels.append(reading['pollution_level'])
+            first = chunk[0][1]
+            update = {
+                '$push': {'readings': {'$each': samples}},
+                '$inc': {'count': len(samples), 'level_sum': sum(levels), 'level_count': len(levels)},
+                '$min': {'first_at': min(at for at, _ in chunk)},
+                '$max': {'last_at': max(at for at, _ in chunk)},
+                '$setOnInsert': {
+                    'bucket_end': bucket_start + timedelta(hours=1),
+                    'location': first.get('location'),
+                    'lat': first.get('lat'),
+                    'lng': first.get('lng')
+                }
+            }
+            if levels:
+                update['$min']['min_level'] = min(levels)
+                update['$max']['max_level'] = max(levels)
+            operations.append(UpdateOne(
+                {'sensor_id': sensor_id, 'bucket_start': bucket_start, 'count': {'$lte': max_readings - len(samples)}},
+                update,
+                upsert=True
+            ))
+    return operations
+
+
+def sensor_latest_updates(readings):
+    """Upserts keeping one ``sensor_latest`` document per sensor holding its newest reading.
+
+    The document's ``_id`` is the sensor id and ``reading_id`` the reading's
+    ``_id``. An upsert only replaces a document whose reading is not newer;
+    otherwise it fails with a duplicate key error, which callers ignore.
+    """
+    newest = {}
+    for reading in readings:
+        sensor_id = reading.get('id')
+        if sensor_id is None:
+            continue
+        order = (reading.get('stored_at') or datetime.min, reading_time(reading))
+        if sensor_id not in newest or order >= newest[sensor_id][0]:
+            newest[sensor_id] = (order, reading)
+    operations = []
+    for sensor_id, (_, reading) in newest.items():
+        latest = {key: value for key, value in reading.items() if key != '_id'}
+        latest.update({'_id': sensor_id, 'reading_id': reading.get('_id')})
+        stored_at = latest.get('stored_at')
+        older = {'stored_at': {'$lte': stored_at}} if stored_at else {'stored_at': None}
+        operations.append(ReplaceOne(
+            {'_id': sensor_id, '$or': [older, {'stored_at': None}]}, latest, upsert=True
+        ))
+    return operations
+
+
+def sensor_history_pipeline(match, start, end, resolution, field, from_buckets, percentiles=None):
+    """Aggregation grouping one measurement into ``resolution``-second windows from ``start``.
+
+    ``match`` selects the sensor or region. Bucket documents are unwound into
+    their samples; per-reading documents use their observation time. Each
+    output row is ``{_id: window index, count, min, max, mean}``, plus
+    ``percentiles`` when ``percentiles='server'`` or the raw ``values`` when
+    ``percentiles='values'``.
+    """
+    if from_buckets:
+        pipeline = [
+            {'$match': dict(match, bucket_start={'$gte': start.replace(minute=0, second=0, microsecond=0), '$lt': end})},
+            {'$unwind': '$readings'},
+            {'$project': {'_id': 0, 't': '$readings.t', 'v': f'$readings.{field}'}},
+        ]
+    else:
+        pipeline = [
+            {'$match': dict(match, **{'$or': [
+                {'stored_at': {'$gte': start, '$lt': end}},
+                {'timestamp': {'$gte': start.isoformat(), '$lt': end.isoformat()}}
+            ]})},
+            {'$project': {'_id': 0, 't': OBSERVED_AT, 'v': f'${field}'}},
+        ]
+    group = {
+        '_id': {'$floor': {'$divide': [{'$subtract': ['$t', start]}, resolution * 1000]}},
+        'count': {'$sum': 1},
+        'min': {'$min': '$v'},
+        'max': {'$max': '$v'},
+        'mean': {'$avg': '$v'}
+    }
+    if percentiles == 'server':
+        group['percentiles'] = {'$percentile': {'input': '$v', 'p': [p / 100 for p in PERCENTILES], 'method': 'approximate'}}
+    elif percentiles == 'values':
+        group['values'] = {'$push': '$v'}
+    return pipeline + [
+        {'$match': {'t': {'$gte': start, '$lt': end}, 'v': {'$type': 'number'}}},
+        {'$group': group},
+        {'$sort': {'_id': 1}}
+    ]
+
+
+def _count_by(field):
+    return [
+        {'$group': {'_id': f'${field}', 'count': {'$sum': 1}}},
+        {'$sort': {'count': -1}}
+    ]
+
+
+def citizen_report_analytics_pipeline(now, include_time_windows=True):
+    """One-pass $facet pipeline producing every citizen report analytics section.
+
+    Without ``include_time_windows`` the daily series and the today/week/month
+    counts are left out so they can be read from the report rollups instead.
+    """
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    week_start = today - timedelta(days=7)
+    month_start = today - timedelta(days=30)
+    facets = {
+        'status_statistics': _count_by('status'),
+        'severity_statistics': _count_by('severity'),
+        'location_statistics': _count_by('location'),
+        'pollution_type_statistics': _count_by('pollution_type'),
+        'reporter_type_statistics': _count_by('reporter_type'),
+        'total_reports': [{'$count': 'count'}]
+    }
+    if include_time_windows:
+        # Today, this week and this month are nested windows of the last 30 days
+        facets['windows'] = [
+            {'$match': {'timestamp': {'$gte': month_start}}},
+            {'$group': {
+                '_id': None,
+                'reports_today': {'$sum': {'$cond': [{'$gte': ['$timestamp', today]}, 1, 0]}},
+                'reports_this_week': {'$sum': {'$cond': [{'$gte': ['$timestamp', week_start]}, 1, 0]}},
+                'reports_this_month': {'$sum': 1}
+            }}
+        ]
+        # Daily reports for the last 30 days
+        facets['daily_statistics'] = [
+            {'$match': {'timestamp': {'$gte': month_start}}},
+            {'$group': {
+                '_id': {
+                    'date': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$timestamp'}}
+                },
+                'count': {'$sum': 1}
+            }},
+            {'$sort': {'_id.date': 1}}
+        ]
+    return [{'$facet': facets}]
+
+
+def daily_report_windows(daily_statistics, now):
+    """Reports today, in the last week and in the last 30 days from a daily series"""
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    today = midnight.strftime('%Y-%m-%d')
+    week_start = (midnight - timedelta(days=7)).strftime('%Y-%m-%d')
+    month_start = (midnight - timedelta(days=30)).strftime('%Y-%m-%d')
+    windows = {'reports_today': 0, 'reports_this_week': 0, 'reports_this_month': 0}
+    for day in daily_statistics:
+        date = day['_id']['date']
+        if date >= month_start:
+            windows['reports_this_month'] += day['count']
+        if date >= week_start:
+            windows['reports_this_week'] += day['count']
+        if date >= today:
+            windows['reports_today'] += day['count']
+    return windows
+
+
+def encode_report_cursor(reported_at, report_id):
+    """Opaque continuation token for the report after which the next page starts"""
+    position = {
+        'r': reported_at.isoformat() if isinstance(reported_at, datetime) else None,
+        'i': str(report_id)
+    }
+    return base64.urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_report_cursor(cursor):
+    """Inverse of encode_report_cursor; raises ValueError for malformed tokens"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        reported_at = datetime.fromisoformat(position['r']) if position.get('r') else None
+        return reported_at, ObjectId(position['i'])
+    except Exception as e:
+        raise ValueError(f"Invalid report cursor: {cursor}") from e
+
+
+def _report_time(report):
+    """Best available creation time of a report as a datetime"""
+    for field in ('timestamp', 'reported_at', 'stored_at'):
+        value = report.get(field)
+        if isinstance(value, datetime):
+            return value
+        if isinstance(value, str):
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                continue
+    return datetime.now()
+
+
+def _rollup_field(value):
+    """Make a report attribute safe to use as a rollup sub-document key"""
+    if value is None or value == '':
+        return 'unknown'
+    return str(value).replace('.', '_').lstrip('$') or 'unknown'
+
+
+def report_rollup_periods(when):
+    """(granularity, period, period_start) for the day, ISO week and month containing ``when``"""
+    day = when.replace(hour=0, minute=0, second=0, microsecond=0)
+    iso_year, iso_week, iso_weekday = day.isocalendar()
+    return [
+        ('day', day.strftime('%Y-%m-%d'), day),
+        ('week', f"{iso_year}-W{iso_week:02d}", day - timedelta(days=iso_weekday - 1)),
+        ('month', day.strftime('%Y-%m'), day.replace(day=1))
+    ]
+
+
+def report_rollup_increments(report, sign=1):
+    """$inc document adding (or with ``sign=-1`` removing) one report from a rollup"""
+    location = report.get('location_name') or report.get('location')
+    if not isinstance(location, str):
+        location = None
+    increments = {
+        'count': sign,
+        f"by_severity.{_rollup_field(report.get('severity'))}": sign,
+        f"by_location.{_rollup_field(location)}": sign,
+        f"by_type.{_rollup_field(report.get('pollution_type'))}": sign,
+        f"by_status.{_rollup_field(report.get('status'))}": sign
+    }
+    try:
+        severity = float(report.get('severity'))
+        increments['severity_sum'] = sign * severity
+        increments['severity_samples'] = sign
+    except (TypeError, ValueError):
+        pass
+    return increments
+
+
 class MongoDBManager:
     def __init__(self):
         self.client = MongoClient(Config.MONGODB_URI, server_api=ServerApi('1'))
@@ -16,7 +423,54 @@ class MongoDBManager:
         self.pollution_reports = self.db['pollution_reports']
         self.predictions = self.db['predictions']
         self.cleanup_logs = self.db['cleanup_logs']
+        self.alerts = self.db['alerts']
+        self.report_rollups = self.db['report_rollups']
+        self.prediction_runs = self.db['prediction_runs']
+        self.sensor_buckets = self.db['sensor_buckets']
+        self.sensor_latest = self.db['sensor_latest']
+        self.data_lake_days = self.db['data_lake_days']
+        self.export_watermarks = self.db['export_watermarks']
     
+    def ensure_indexes(self):
+        """Create every index in INDEX_REGISTRY; existing identical indexes are left alone"""
+        created = {}
+        for collection_name, indexes in INDEX_REGISTRY.items():
+            try:
+                created[collection_name] = self.db[collection_name].create_indexes(indexes)
+            except Exception as e:
+                print(f"Error creating indexes on {collection_name}: {e}")
+                created[collection_name] = []
+        return created
+
+    def explain_queries(self):
+        """Explain each query in QUERY_REGISTRY and flag the ones that scan the whole collection"""
+        report = []
+        for name, collection_name, query_filter, sort in QUERY_REGISTRY:
+            entry = {'query': name, 'collection': collection_name, 'stages': [], 'collection_scan': None}
+            try:
+                cursor = self.db[collection_name].find(query_filter)
+                if sort:
+                    cursor = cursor.sort(sort)
+                plan = cursor.limit(1).explain().get('queryPlanner', {}).get('winningPlan', {})
+                entry['stages'] = self._plan_stages(plan)
+                entry['collection_scan'] = 'COLLSCAN' in entry['stages']
+            except Exception as e:
+                entry['error'] = str(e)
+            report.append(entry)
+        return report
+
+    def _plan_stages(self, plan):
+        """Flatten the stage names of an explain() winning plan"""
+        stages = []
+        if isinstance(plan, dict):
+            if 'stage' in plan:
+                stages.append(plan['stage'])
+            for key in ('queryPlan', 'inputStage', 'inputStages'):
+                value = plan.get(key)
+                for child in value if isinstance(value, list) else [value]:
+                    stages.extend(self._plan_stages(child))
+        return stages
+
     def test_connection(self):
         """Test MongoDB connection"""
         try:
@@ -29,22 +483,466 @@ class MongoDBManager:
     def store_sensor_data(self, sensor_data):
         """Store IoT sensor data, ignore duplicate key errors."""
         try:
-            for sensor in sensor_data:
-                sensor['stored_at'] = datetime.now()
-                try:
-                    self.sensors.insert_one(sensor)
-                except DuplicateKeyError:
-                    # Ignore duplicate key errors silently
-                    continue
-            return True
+            result = self.store_sensor_data_bulk(sensor_data)
+            return result['errors'] == 0
         except Exception as e:
             print(f"Error storing sensor data: {e}")
             return False
+
+    def store_sensor_data_bulk(self, sensor_data, batch_size=None):
+        """Store IoT sensor data with unordered batched writes.
+
+        Each batch is sent as a single ``insert_many(ordered=False)`` call so the
+        server keeps inserting past duplicate-key rejects. Returns the totals and
+        a per-batch breakdown of inserted, duplicate and failed documents.
+        """
+        batch_size = batch_size or Config.SENSOR_BULK_BATCH_SIZE
+        sensor_data = list(sensor_data)
+        summary = {'inserted': 0, 'duplicates': 0, 'errors': 0, 'batches': []}
+        for start in range(0, len(sensor_data), batch_size):
+            batch = sensor_data[start:start + batch_size]
+            stored_at = datetime.now()
+            for sensor in batch:
+                sensor['stored_at'] = stored_at
+                sensor.update(spatial_fields(sensor))
+            batch_stats = {'size': len(batch), 'inserted': 0, 'duplicates': 0, 'errors': 0}
+            inserted = batch
+            try:
+                result = self.sensors.insert_many(batch, ordered=False)
+                batch_stats['inserted'] = len(result.inserted_ids)
+            except BulkWriteError as e:
+                details = e.details or {}
+                batch_stats['inserted'] = details.get('nInserted', 0)
+                rejected = {write_error.get('index') for write_error in details.get('writeErrors', [])}
+                inserted = [sensor for i, sensor in enumerate(batch) if i not in rejected]
+                for write_error in details.get('writeErrors', []):
+                    # 11000 is the server's duplicate key error code
+                    if write_error.get('code') == 11000:
+                        batch_stats['duplicates'] += 1
+                    else:
+                        batch_stats['errors'] += 1
+            except Exception as e:
+                print(f"Error storing sensor batch: {e}")
+                batch_stats['errors'] = len(batch)
+                inserted = []
+            if inserted:
+                self.evaluate_alerts(inserted)
+                self.store_latest_readings(inserted)
+                if Config.SENSOR_STORAGE_MODE == 'dual':
+                    self.store_sensor_buckets(inserted)
+            summary['inserted'] += batch_stats['inserted']
+            summary['duplicates'] += batch_stats['duplicates']
+            summary['errors'] += batch_stats['errors']
+            summary['batches'].append(batch_stats)
+        if summary['inserted']:
+            # Cached dashboard aggregates no longer reflect the latest readings
+            dashboard_cache.invalidate(*SENSOR_CACHE_KEYS)
+        return summary
     
-    def get_recent_sensor_data(self, limit=50):
+    def store_latest_readings(self, readings):
+        """Upsert each sensor's newest reading into ``sensor_latest``; returns the number of sensors updated"""
+        operations = sensor_latest_updates(readings)
+        if not operations:
+            return 0
+        try:
+            result = self.sensor_latest.bulk_write(operations, ordered=False)
+            return result.modified_count + result.upserted_count
+        except BulkWriteError as e:
+            details = e.details or {}
+            # Duplicate keys mean the stored reading is already newer
+            for write_error in details.get('writeErrors', []):
+                if write_error.get('code') != 11000:
+                    print(f"Error storing latest reading: {write_error.get('errmsg')}")
+            return details.get('nModified', 0) + details.get('nUpserted', 0)
+        except Exception as e:
+            print(f"Error storing latest readings: {e}")
+            return 0
+
+    def rebuild_sensor_latest(self, batch_size=1000):
+        """Recompute ``sensor_latest`` from the full reading history (backfill or repair)"""
+        try:
+            self.sensor_latest.delete_many({})
+            pipeline = [
+                {'$sort': {'stored_at': -1, 'timestamp': -1}},
+                {'$group': {'_id': '$id', 'reading': {'$first': '$$ROOT'}}},
+                {'$replaceRoot': {'newRoot': '$reading'}}
+            ]
+            stored = 0
+            batch = []
+            for reading in self.sensors.aggregate(pipeline, allowDiskUse=True):
+                batch.append(reading)
+                if len(batch) >= batch_size:
+                    stored += self.store_latest_readings(batch)
+                    batch = []
+            if batch:
+                stored += self.store_latest_readings(batch)
+            return stored
+        except Exception as e:
+            print(f"Error rebuilding latest sensor readings: {e}")
+            return 0
+
+    def bootstrap_sensor_latest(self):
+        """Backfill ``sensor_latest`` once when readings exist but no latest readings do"""
+        try:
+            if self.sensor_latest.estimated_document_count() == 0 and self.sensors.estimated_document_count() > 0:
+                return self.rebuild_sensor_latest()
+            return 0
+        except Exception as e:
+            print(f"Error bootstrapping latest sensor readings: {e}")
+            return 0
+
+    def store_sensor_buckets(self, readings):
+        """Append readings to their hourly ``sensor_buckets`` documents; returns the number of buckets touched"""
+        try:
+            operations = sensor_bucket_updates(readings)
+            if not operations:
+                return 0
+            result = self.sensor_buckets.bulk_write(operations, ordered=False)
+            return result.modified_count + result.upserted_count
+        except Exception as e:
+            print(f"Error storing sensor buckets: {e}")
+            return 0
+
+    def get_sensor_readings(self, sensor_id, start, end, fields=None):
+        """Readings of one sensor with ``start <= t < end``, oldest first, as ``{'t', ...}`` samples.
+
+        In ``dual`` storage mode this reads the few hourly buckets covering the
+        window; otherwise it falls back to the per-reading documents.
+        """
+        fields = tuple(fields or SENSOR_BUCKET_FIELDS)
+        try:
+            if Config.SENSOR_STORAGE_MODE == 'dual':
+                cursor = self.sensor_buckets.find(
+                    {'sensor_id': sensor_id, 'bucket_start': {'$gte': start.replace(minute=0, second=0, microsecond=0), '$lt': end}},
+                    {'_id': 0, 'readings': 1}
+                )
+                samples = [
+                    {'t': sample['t'], **{field: sample[field] for field in fields if field in sample}}
+                    for bucket in cursor
+                    for sample in bucket.get('readings', [])
+                    if start <= sample['t'] < end
+                ]
+            else:
+                projection = {field: 1 for field in fields + ('timestamp', 'stored_at')}
+                projection['_id'] = 0
+                cursor = self.sensors.find({'id': sensor_id, '$or': [
+                    {'stored_at': {'$gte': start, '$lt': end}},
+                    {'timestamp': {'$gte': start.isoformat(), '$lt': end.isoformat()}}
+                ]}, projection)
+                samples = []
+                for reading in cursor:
+                    at = reading_time(reading)
+                    if start <= at < end:
+                        samples.append({'t': at, **{field: reading[field] for field in fields if field in reading}})
+            samples.sort(key=lambda sample: sample['t'])
+            return samples
+        except Exception as e:
+            print(f"Error retrieving readings for sensor {sensor_id}: {e}")
+            return []
+
+    def get_sensor_history(self, start, end, resolution, sensor_id=None, region=None,
+                           field='pollution_level', percentiles=True):
+        """Windowed count/min/max/mean/percentiles of ``field`` for a sensor or a region.
+
+        Returns one entry per non-empty ``resolution``-second window between
+        ``start`` and ``end``. In ``dual`` storage mode, hour-aligned
+        pollution-level windows without percentiles are answered from the
+        bucket summaries alone.
+        """
+        start, end = naive_utc(start), naive_utc(end)
+        from_buckets = Config.SENSOR_STORAGE_MODE == 'dual'
+        id_field = 'sensor_id' if from_buckets else 'id'
+        match = {id_field: sensor_id} if sensor_id else {'location': region}
+        try:
+            if (from_buckets and not percentiles and field == 'pollution_level'
+                    and self._bucket_aligned(start, end, resolution)):
+                return self._bucket_summary_history(match, start, end, resolution)
+            collection = self.sensor_buckets if from_buckets else self.sensors
+            if percentiles:
+                percentiles = 'server' if Config.HISTORY_DB_PERCENTILES else 'values'
+            pipeline = sensor_history_pipeline(match, start, end, resolution, field, from_buckets, percentiles)
+            windows = []
+            for row in collection.aggregate(pipeline, allowDiskUse=True):
+                window = {
+                    'start': window_start(start, int(row['_id']), resolution),
+                    'count': row['count'],
+                    'min': row['min'],
+                    'max': row['max'],
+                    'mean': round(row['mean'], 4)
+                }
+                if 'percentiles' in row:
+                    window.update({f'p{p}': value for p, value in zip(PERCENTILES, row['percentiles'])})
+                elif 'values' in row:
+                    values = sorted(row['values'])
+                    window.update({f'p{p}': percentile(values, p) for p in PERCENTILES})
+                windows.append(window)
+            return windows
+        except Exception as e:
+            print(f"Error retrieving sensor history: {e}")
+            return []
+
+    def _bucket_aligned(self, start, end, resolution):
+        """Whether every window is a whole number of complete hourly buckets"""
+        def on_hour(moment):
+            return moment.minute == 0 and moment.second == 0 and moment.microsecond == 0
+        return resolution % 3600 == 0 and on_hour(start) and on_hour(end)
+
+    def _bucket_summary_history(self, match, start, end, resolution):
+        """Windowed pollution-level statistics from bucket summaries, without unwinding samples"""
+        pipeline = [
+            {'$match': dict(match, bucket_start={'$gte': start, '$lt': end})},
+            {'$group': {
+                '_id': {'$floor': {'$divide': [{'$subtract': ['$bucket_start', start]}, resolution * 1000]}},
+                'count': {'$sum': '$level_count'},
+                'min': {'$min': '$min_level'},
+                'max': {'$max': '$max_level'},
+                'level_sum': {'$sum': '$level_sum'}
+            }},
+            {'$match': {'count': {'$gt': 0}}},
+            {'$sort': {'_id': 1}}
+        ]
+        return [{
+            'start': window_start(start, int(row['_id']), resolution),
+            'count': row['count'],
+            'min': row['min'],
+            'max': row['max'],
+            'mean': round(row['level_sum'] / row['count'], 4)
+        } for row in self.sensor_buckets.aggregate(pipeline)]
+
+    def evaluate_alerts(self, readings):
+        """Update the alerts collection from newly ingested readings.
+
+        Only the sensors present in ``readings`` are touched. Each alert moves
+        between ``active`` and ``resolved`` and records opened, escalated,
+        deescalated and resolved transitions in its ``history``.
+        """
+        try:
+            latest = {}
+            for reading in readings:
+                if reading.get('id') is not None and reading.get('pollution_level') is not None:
+                    latest[f"alert-{reading['id']}"] = reading
+            if not latest:
+                return 0
+            existing = {
+                alert['alert_id']: alert
+                for alert in self.alerts.find({'alert_id': {'$in': list(latest)}}, {'alert_id': 1, 'status': 1, 'severity': 1})
+            }
+            now = datetime.now()
+            operations = []
+            for alert_id, reading in latest.items():
+                level = reading['pollution_level']
+                current = existing.get(alert_id)
+                is_active = current is not None and current.get('status') == 'active'
+                if level <= ALERT_THRESHOLD:
+                    if is_active:
+                        operations.append(UpdateOne({'alert_id': alert_id}, {
+                            '$set': {'status': 'resolved', 'pollution_level': level, 'resolved_at': now, 'updated_at': now},
+                            '$push': {'history': {'transition': 'resolved', 'pollution_level': level, 'at': now}}
+                        }))
+                    continue
+                severity = 'high' if level > HIGH_SEVERITY_THRESHOLD else 'medium'
+                fields = {
+                    'sensor_id': reading['id'],
+                    'location': reading.get('location'),
+                    'pollution_level': level,
+                    'severity': severity,
+                    'status': 'active',
+                    'message': f"High pollution detected in {reading.get('location')}",
+                    'timestamp': reading.get('timestamp', now.isoformat()),
+                    'actions_required': ['deploy_cleanup_units', 'notify_authorities'],
+                    'updated_at': now
+                }
+                if not is_active:
+                    transition = 'opened'
+                    fields['opened_at'] = now
+                elif current.get('severity') != severity:
+                    transition = 'escalated' if severity == 'high' else 'deescalated'
+                else:
+                    transition = None
+                update = {'$set': fields}
+                if transition:
+                    update['$push'] = {'history': {'transition': transition, 'severity': severity, 'pollution_level': level, 'at': now}}
+                    # A new or changed alert needs a fresh agent recommendation
+                    update['$unset'] = {'recommendation_html': ''}
+                operations.append(UpdateOne({'alert_id': alert_id}, update, upsert=True))
+            if operations:
+                self.alerts.bulk_write(operations, ordered=False)
+            return len(operations)
+        except Exception as e:
+            print(f"Error evaluating sensor alerts: {e}")
+            return 0
+
+    def get_active_alerts(self, limit=100):
+        """Get active alerts, most recently updated first"""
+        try:
+            cursor = self.alerts.find({'status': 'active'}, {'_id': 0, 'history': 0}).sort('updated_at', -1).limit(limit)
+            return list(cursor)
+        except Exception as e:
+            print(f"Error retrieving active alerts: {e}")
+            return []
+
+    def get_alert(self, alert_id):
+        """Get a single alert by its alert id"""
+        try:
+            return self.alerts.find_one({'alert_id': alert_id}, {'_id': 0})
+        except Exception as e:
+            print(f"Error retrieving alert: {e}")
+            return None
+
+    def set_alert_recommendations(self, recommendations):
+        """Persist agent recommendation HTML for ``{alert_id: html}``"""
+        try:
+            operations = [
+                UpdateOne({'alert_id': alert_id}, {'$set': {'recommendation_html': html}})
+                for alert_id, html in recommendations.items() if html
+            ]
+            if operations:
+                self.alerts.bulk_write(operations, ordered=False)
+            return True
+        except Exception as e:
+            print(f"Error storing alert recommendations: {e}")
+            return False
+
+    def bootstrap_alerts(self, limit=1000):
+        """Evaluate existing readings once when the alerts collection is empty"""
+        try:
+            if self.alerts.estimated_document_count() > 0:
+                return 0
+            # Oldest first so the latest reading per sensor wins
+            readings = self.get_recent_sensor_data(limit=limit)
+            readings.reverse()
+            return self.evaluate_alerts(readings)
+        except Exception as e:
+            print(f"Error bootstrapping alerts: {e}")
+            return 0
+
+    def backfill_sensor_geo(self, batch_size=1000):
+        """Add ``geo``/``geohash`` to sensor readings stored before they were indexed"""
+        try:
+            updated = 0
+            cursor = self.sensors.find({'geo': {'$exists': False}, 'lat': {'$exists': True}}, {'lat': 1, 'lng': 1})
+            operations = []
+            for sensor in cursor.batch_size(batch_size):
+                fields = spatial_fields(sensor)
+                if fields:
+                    operations.append(UpdateOne({'_id': sensor['_id']}, {'$set': fields}))
+                if len(operations) >= batch_size:
+                    updated += self.sensors.bulk_write(operations, ordered=False).modified_count
+                    operations = []
+            if operations:
+                updated += self.sensors.bulk_write(operations, ordered=False).modified_count
+            return updated
+        except Exception as e:
+            print(f"Error backfilling sensor locations: {e}")
+            return 0
+
+    def _hotspot_stages(self, threshold, limit, order=None):
+        """Keep latest readings above ``threshold``, highest (or by ``order``) first"""
+        return [
+            {'$match': {'pollution_level': {'$gt': threshold}}},
+            {'$sort': order or {'pollution_level': -1}},
+            {'$limit': limit}
+        ]
+
+    def find_hotspots_in_bbox(self, south, west, north, east, threshold=None, limit=None):
+        """Latest reading per sensor inside a bounding box, above ``threshold``, highest first"""
+        threshold = Config.HOTSPOT_THRESHOLD if threshold is None else threshold
+        try:
+            pipeline = [
+                {'$match': bbox_filter(south, west, north, east)},
+            ] + self._hotspot_stages(threshold, limit or Config.HOTSPOT_QUERY_LIMIT)
+            return self._latest_documents(self.sensor_latest.aggregate(pipeline))
+        except Exception as e:
+            print(f"Error finding hotspots in bounding box: {e}")
+            return []
+
+    def find_hotspots_near(self, lat, lng, radius_km=None, k=None, threshold=None):
+        """Latest reading per sensor nearest to a point, above ``threshold``, closest first.
+
+        ``radius_km`` bounds the search distance and ``k`` the number of results.
+        Each result carries ``distance_km``.
+        """
+        threshold = Config.HOTSPOT_THRESHOLD if threshold is None else threshold
+        limit = k or Config.HOTSPOT_QUERY_LIMIT
+        try:
+            geo_near = {
+                'near': {'type': 'Point', 'coordinates': [lng, lat]},
+                'distanceField': 'distance_km',
+                'distanceMultiplier': 0.001,
+                'spherical': True,
+                'key': 'geo'
+            }
+            if radius_km is not None:
+                geo_near['maxDistance'] = radius_km * 1000
+            pipeline = [{'$geoNear': geo_near}] + self._hotspot_stages(threshold, limit, {'distance_km': 1})
+            return self._latest_documents(self.sensor_latest.aggregate(pipeline))
+        except Exception as e:
+            print(f"Error finding hotspots near point: {e}")
+            return []
+
+    def get_sensor_map_view(self, south, west, north, east, precision, projection=None, max_points=None, max_cells=None):
+        """Latest reading per sensor in a viewport, as points and as geohash cells.
+
+        One aggregation returns the sensor ``total``, up to ``max_points``
+        ``points`` (with ``projection``), and up to ``max_cells`` ``cells`` grouped by
+        geohash prefix of length ``precision`` with count, mean and max level.
+        The caller picks points or cells, so the payload is bounded either way.
+        """
+        max_points = max_points or Config.MAP_MAX_POINTS
+        max_cells = max_cells or Config.MAP_MAX_CELLS
+        points = [{'$sort': {'pollution_level': -1}}, {'$limit': max_points}]
+        if projection:
+            points.append({'$project': _projection_keeping(projection, 'reading_id')})
+        try:
+            pipeline = [
+                {'$match': bbox_filter(south, west, north, east)},
+                {'$facet': {
+                    'total': [{'$count': 'sensors'}],
+                    'points': points,
+                    'cells': [
+                        {'$group': {
+                            '_id': {'$substrCP': ['$geohash', 0, precision]},
+                            'count': {'$sum': 1},
+                            'mean_level': {'$avg': '$pollution_level'},
+                            'max_level': {'$max': '$pollution_level'},
+                            'lat': {'$avg': '$lat'},
+                            'lng': {'$avg': '$lng'}
+                        }},
+                        {'$sort': {'count': -1}},
+                        {'$limit': max_cells}
+                    ]
+                }}
+            ]
+            result = next(self.sensor_latest.aggregate(pipeline), {})
+            total = result.get('total') or [{'sensors': 0}]
+            return {
+                'total': total[0]['sensors'],
+                'points': self._latest_documents(result.get('points', [])),
+                'cells': result.get('cells', [])
+            }
+        except Exception as e:
+            print(f"Error building sensor map view: {e}")
+            return {'total': 0, 'points': [], 'cells': []}
+
+    def _latest_documents(self, documents):
+        """``sensor_latest`` documents shaped like the readings they hold, with string ids"""
+        documents = list(documents)
+        for document in documents:
+            if 'reading_id' in document:
+                document['_id'] = document.pop('reading_id')
+        return self._stringify_ids(documents)
+
+    def _stringify_ids(self, documents):
+        documents = list(documents)
+        for document in documents:
+            if '_id' in document:
+                document['_id'] = str(document['_id'])
+        return documents
+
+    def get_recent_sensor_data(self, limit=50, projection=None):
         """Get recent sensor data"""
         try:
-            cursor = self.sensors.find().sort('stored_at', -1).limit(limit)
+            cursor = self.sensors.find({}, resolve_projection(projection)).sort('stored_at', -1).limit(limit)
             data = list(cursor)
             # Convert ObjectId to string for JSON serialization
             for item in data:
@@ -60,6 +958,8 @@ class MongoDBManager:
         try:
             report_data['reported_at'] = datetime.now()
             result = self.pollution_reports.insert_one(report_data)
+            self.update_report_rollups(report_data, report_rollup_increments(report_data))
+            dashboard_cache.invalidate(*REPORT_CACHE_KEYS)
             return str(result.inserted_id)
         except Exception as e:
             print(f"Error storing pollution report: {e}")
@@ -94,24 +994,57 @@ class MongoDBManager:
             print(f"Error getting statistics: {e}")
             return {'total_reports': 0, 'reports_today': 0, 'region_statistics': []}
 
-    def get_all_reports(self):
-        """Get all citizen pollution reports"""
-        try:
-            cursor = self.pollution_reports.find().sort('reported_at', -1)
-            reports = list(cursor)
-            # Convert ObjectId to string for JSON serialization
-            for report in reports:
-                if '_id' in report:
-                    report['_id'] = str(report['_id'])
-            return reports
-        except Exception as e:
-            print(f"Error retrieving all reports: {e}")
-            return []
+    def get_reports_page(self, page_size=None, cursor=None, projection=None):
+        """Get one page of citizen pollution reports, newest first.
+
+        Pages are keyset-paginated on ``(reported_at, _id)``. Returns
+        ``(reports, next_cursor)``; ``next_cursor`` is None on the last page.
+        Raises ValueError for a malformed ``cursor``.
+        """
+        # limit(0) means no limit, so never let the page size drop below 1
+        page_size = max(1, min(page_size or Config.REPORTS_PAGE_SIZE, Config.REPORTS_MAX_PAGE_SIZE))
+        query = self._report_keyset_filter(cursor) if cursor else {}
+        # The continuation token is built from the last report's sort key
+        projection = _projection_keeping(projection, '_id', 'reported_at')
+        reports = list(
+            self.pollution_reports.find(query, projection)
+            .sort([('reported_at', DESCENDING), ('_id', DESCENDING)])
+            .limit(page_size + 1)
+        )
+        next_cursor = None
+        if len(reports) > page_size:
+            reports = reports[:page_size]
+            last = reports[-1]
+            next_cursor = encode_report_cursor(last.get('reported_at'), last['_id'])
+        # Convert ObjectId to string for JSON serialization
+        for report in reports:
+            report['_id'] = str(report['_id'])
+        return reports, next_cursor
+
+    def iter_reports(self, batch_size=500, projection=None):
+        """Yield every citizen pollution report, newest first, without building a list"""
+        cursor = self.pollution_reports.find({}, resolve_projection(projection)).sort([('reported_at', DESCENDING), ('_id', DESCENDING)]).batch_size(batch_size)
+        for report in cursor:
+            if '_id' in report:
+                report['_id'] = str(report['_id'])
+            yield report
+
+    def _report_keyset_filter(self, cursor):
+        """Filter selecting the reports that sort after ``cursor`` in (reported_at, _id) descending order"""
+        reported_at, last_id = decode_report_cursor(cursor)
+        if reported_at is None:
+            # Reports without reported_at sort last; only the _id tie-break is left
+            return {'reported_at': None, '_id': {'$lt': last_id}}
+        return {'$or': [
+            {'reported_at': {'$lt': reported_at}},
+            {'reported_at': reported_at, '_id': {'$lt': last_id}},
+            {'reported_at': None}
+        ]}
     
-    def get_report_by_id(self, report_id):
+    def get_report_by_id(self, report_id, projection=None):
         """Get specific pollution report by ID"""
         try:
-            report = self.pollution_reports.find_one({'_id': ObjectId(report_id)})
+            report = self.pollution_reports.find_one({'_id': ObjectId(report_id)}, resolve_projection(projection))
             if report and '_id' in report:
                 report['_id'] = str(report['_id'])
             return report
@@ -127,6 +1060,8 @@ class MongoDBManager:
             report_data['stored_at'] = datetime.now()
             report_data['status'] = report_data.get('status', 'pending')
             result = self.pollution_reports.insert_one(report_data)
+            self.update_report_rollups(report_data, report_rollup_increments(report_data))
+            dashboard_cache.invalidate(*REPORT_CACHE_KEYS)
             return str(result.inserted_id)
         except Exception as e:
             print(f"Error storing citizen report: {e}")
@@ -146,10 +1081,10 @@ class MongoDBManager:
             print(f"Error storing chat session: {e}")
             return None
     
-    def get_citizen_report(self, report_id):
+    def get_citizen_report(self, report_id, projection=None):
         """Get specific citizen report by ID"""
         try:
-            report = self.pollution_reports.find_one({'report_id': report_id})
+            report = self.pollution_reports.find_one({'report_id': report_id}, resolve_projection(projection))
             if report and '_id' in report:
                 report['_id'] = str(report['_id'])
             return report
@@ -157,10 +1092,10 @@ class MongoDBManager:
             print(f"Error retrieving citizen report: {e}")
             return None
     
-    def get_citizen_reports_by_location(self, location):
+    def get_citizen_reports_by_location(self, location, projection=None):
         """Get citizen reports for a specific location"""
         try:
-            cursor = self.pollution_reports.find({'location': location}).sort('timestamp', -1)
+            cursor = self.pollution_reports.find({'location': location}, resolve_projection(projection)).sort('timestamp', -1)
             reports = list(cursor)
             for report in reports:
                 if '_id' in report:
@@ -170,10 +1105,10 @@ class MongoDBManager:
             print(f"Error retrieving reports by location: {e}")
             return []
     
-    def get_citizen_reports_by_severity(self, severity):
+    def get_citizen_reports_by_severity(self, severity, projection=None):
         """Get citizen reports by severity level"""
         try:
-            cursor = self.pollution_reports.find({'severity': severity}).sort('timestamp', -1)
+            cursor = self.pollution_reports.find({'severity': severity}, resolve_projection(projection)).sort('timestamp', -1)
             reports = list(cursor)
             for report in reports:
                 if '_id' in report:
@@ -186,7 +1121,7 @@ class MongoDBManager:
     def update_citizen_report_status(self, report_id, new_status, notes=''):
         """Update status of a citizen report"""
         try:
-            result = self.pollution_reports.update_one(
+            previous = self.pollution_reports.find_one_and_update(
                 {'report_id': report_id},
                 {
                     '$set': {
@@ -194,110 +1129,63 @@ class MongoDBManager:
                         'status_updated_at': datetime.now(),
                         'status_notes': notes
                     }
-                }
+                },
+                projection={'status': 1, 'timestamp': 1, 'reported_at': 1, 'stored_at': 1},
+                return_document=ReturnDocument.BEFORE
             )
-            return result.modified_count > 0
+            if previous is None:
+                return False
+            if previous.get('status') != new_status:
+                self.update_report_rollups(previous, {
+                    f"by_status.{_rollup_field(previous.get('status'))}": -1,
+                    f"by_status.{_rollup_field(new_status)}": 1
+                })
+            dashboard_cache.invalidate(*REPORT_CACHE_KEYS)
+            return True
         except Exception as e:
             print(f"Error updating citizen report status: {e}")
             return False
     
     def get_citizen_report_analytics(self):
-        """Get analytics for citizen reports"""
+        """Get analytics for citizen reports (cached for ANALYTICS_CACHE_TTL seconds)"""
         try:
-            # Total reports by status
-            status_pipeline = [
-                {'$group': {
-                    '_id': '$status',
-                    'count': {'$sum': 1}
-                }},
-                {'$sort': {'count': -1}}
-            ]
-            status_stats = list(self.pollution_reports.aggregate(status_pipeline))
-            
-            # Reports by severity
-            severity_pipeline = [
-                {'$group': {
-                    '_id': '$severity',
-                    'count': {'$sum': 1}
-                }},
-                {'$sort': {'count': -1}}
-            ]
-            severity_stats = list(self.pollution_reports.aggregate(severity_pipeline))
-            
-            # Reports by location
-            location_pipeline = [
-                {'$group': {
-                    '_id': '$location',
-                    'count': {'$sum': 1}
-                }},
-                {'$sort': {'count': -1}}
-            ]
-            location_stats = list(self.pollution_reports.aggregate(location_pipeline))
-            
-            # Reports by pollution type
-            pollution_type_pipeline = [
-                {'$group': {
-                    '_id': '$pollution_type',
-                    'count': {'$sum': 1}
-                }},
-                {'$sort': {'count': -1}}
-            ]
-            pollution_type_stats = list(self.pollution_reports.aggregate(pollution_type_pipeline))
-            
-            # Reports by reporter type
-            reporter_type_pipeline = [
-                {'$group': {
-                    '_id': '$reporter_type',
-                    'count': {'$sum': 1}
-                }},
-                {'$sort': {'count': -1}}
-            ]
-            reporter_type_stats = list(self.pollution_reports.aggregate(reporter_type_pipeline))
-            
-            # Daily reports for the last 30 days
-            daily_pipeline = [
-                {'$match': {
-                    'timestamp': {
-                        '$gte': datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=30)
-                    }
-                }},
-                {'$group': {
-                    '_id': {
-                        'date': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$timestamp'}}
-                    },
-                    'count': {'$sum': 1}
-                }},
-                {'$sort': {'_id.date': 1}}
-            ]
-            daily_stats = list(self.pollution_reports.aggregate(daily_pipeline))
-            
-            return {
-                'status_statistics': status_stats,
-                'severity_statistics': severity_stats,
-                'location_statistics': location_stats,
-                'pollution_type_statistics': pollution_type_stats,
-                'reporter_type_statistics': reporter_type_stats,
-                'daily_statistics': daily_stats,
-                'total_reports': self.pollution_reports.count_documents({}),
-                'reports_today': self.pollution_reports.count_documents({
-                    'timestamp': {
-                        '$gte': datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-                    }
-                }),
-                'reports_this_week': self.pollution_reports.count_documents({
-                    'timestamp': {
-                        '$gte': datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=7)
-                    }
-                }),
-                'reports_this_month': self.pollution_reports.count_documents({
-                    'timestamp': {
-                        '$gte': datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=30)
-                    }
-                })
-            }
+            return dashboard_cache.get_or_set(
+                'citizen_report_analytics',
+                lambda: self.compute_citizen_report_analytics(self.pollution_reports, daily_from_rollups=True),
+                ttl=Config.ANALYTICS_CACHE_TTL
+            )
         except Exception as e:
             print(f"Error getting citizen report analytics: {e}")
             return {}
+
+    def compute_citizen_report_analytics(self, collection, daily_from_rollups=False):
+        """Compute citizen report analytics with a single $facet aggregation.
+
+        With ``daily_from_rollups`` the daily series and the today/week/month
+        counts are read from the daily rollups instead of being grouped from
+        the reports themselves, so both use the same observation time.
+        """
+        now = datetime.now()
+        pipeline = citizen_report_analytics_pipeline(now, include_time_windows=not daily_from_rollups)
+        result = next(collection.aggregate(pipeline), {})
+        if daily_from_rollups:
+            result['daily_statistics'] = self.get_daily_report_statistics(days=30)
+            windows = daily_report_windows(result['daily_statistics'], now)
+        else:
+            windows = (result.get('windows') or [{}])[0]
+        totals = (result.get('total_reports') or [{}])[0]
+        return {
+            'status_statistics': result.get('status_statistics', []),
+            'severity_statistics': result.get('severity_statistics', []),
+            'location_statistics': result.get('location_statistics', []),
+            'pollution_type_statistics': result.get('pollution_type_statistics', []),
+            'reporter_type_statistics': result.get('reporter_type_statistics', []),
+            'daily_statistics': result.get('daily_statistics', []),
+            'total_reports': totals.get('count', 0),
+            'reports_today': windows.get('reports_today', 0),
+            'reports_this_week': windows.get('reports_this_week', 0),
+            'reports_this_month': windows.get('reports_this_month', 0)
+        }
     
     def get_citizen_engagement_data(self):
         """Get citizen engagement data"""
@@ -341,13 +1229,13 @@ class MongoDBManager:
             print(f"Error storing engagement campaign: {e}")
             return None
     
-    def get_engagement_campaigns(self):
+    def get_engagement_campaigns(self, projection=None, limit=0):
         """Get all engagement campaigns"""
         try:
             if not hasattr(self, 'campaigns'):
                 self.campaigns = self.db['campaigns']
             
-            cursor = self.campaigns.find().sort('created_at', -1)
+            cursor = self.campaigns.find({}, resolve_projection(projection)).limit(limit).sort('created_at', -1)
             campaigns = list(cursor)
             for campaign in campaigns:
                 if '_id' in campaign:
@@ -358,44 +1246,27 @@ class MongoDBManager:
             return []
     
     def get_citizen_report_trends(self):
-        """Get trends in citizen reports"""
+        """Get trends in citizen reports from the monthly and weekly rollups"""
         try:
+            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
             # Monthly trends for the last 12 months
-            monthly_pipeline = [
-                {'$match': {
-                    'timestamp': {
-                        '$gte': datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=365)
-                    }
-                }},
-                {'$group': {
-                    '_id': {
-                        'year': {'$year': '$timestamp'},
-                        'month': {'$month': '$timestamp'}
-                    },
-                    'count': {'$sum': 1},
-                    'avg_severity': {'$avg': {'$toDouble': '$severity'}}
-                }},
-                {'$sort': {'_id.year': 1, '_id.month': 1}}
-            ]
-            monthly_trends = list(self.pollution_reports.aggregate(monthly_pipeline))
+            monthly_trends = []
+            for rollup in self._read_report_rollups('month', (today - timedelta(days=365)).replace(day=1)):
+                samples = rollup.get('severity_samples', 0)
+                monthly_trends.append({
+                    '_id': {'year': rollup['period_start'].year, 'month': rollup['period_start'].month},
+                    'count': rollup.get('count', 0),
+                    'avg_severity': rollup.get('severity_sum', 0) / samples if samples else None
+                })
             
-            # Weekly trends for the last 12 weeks
-            weekly_pipeline = [
-                {'$match': {
-                    'timestamp': {
-                        '$gte': datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=84)
-                    }
-                }},
-                {'$group': {
-                    '_id': {
-                        'year': {'$year': '$timestamp'},
-                        'week': {'$week': '$timestamp'}
-                    },
-                    'count': {'$sum': 1}
-                }},
-                {'$sort': {'_id.year': 1, '_id.week': 1}}
-            ]
-            weekly_trends = list(self.pollution_reports.aggregate(weekly_pipeline))
+            # Weekly (ISO week) trends for the last 12 weeks
+            weekly_trends = []
+            for rollup in self._read_report_rollups('week', today - timedelta(days=84 + today.weekday())):
+                iso_year, iso_week, _ = rollup['period_start'].isocalendar()
+                weekly_trends.append({
+                    '_id': {'year': iso_year, 'week': iso_week},
+                    'count': rollup.get('count', 0)
+                })
             
             return {
                 'monthly_trends': monthly_trends,
@@ -405,6 +1276,82 @@ class MongoDBManager:
             print(f"Error getting citizen report trends: {e}")
             return {}
 
+    def _read_report_rollups(self, granularity, since):
+        """Non-empty rollups of one granularity starting at or after ``since``, oldest first"""
+        cursor = self.report_rollups.find(
+            {'granularity': granularity, 'period_start': {'$gte': since}, 'count': {'$gt': 0}}
+        ).sort('period_start', 1)
+        return list(cursor)
+
+    def get_daily_report_statistics(self, days=30):
+        """Reports per day for the last ``days`` days, read from the daily rollups"""
+        since = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+        return [
+            {'_id': {'date': rollup['period']}, 'count': rollup['count']}
+            for rollup in self._read_report_rollups('day', since)
+        ]
+
+    def update_report_rollups(self, report, increments):
+        """Apply ``$inc`` increments to the day, week and month rollups of a report"""
+        try:
+            operations = [
+                UpdateOne(
+                    {'_id': f"{granularity}:{period}"},
+                    {
+                        '$inc': increments,
+                        '$setOnInsert': {'granularity': granularity, 'period': period, 'period_start': period_start}
+                    },
+                    upsert=True
+                )
+                for granularity, period, period_start in report_rollup_periods(_report_time(report))
+            ]
+            self.report_rollups.bulk_write(operations, ordered=False)
+            return True
+        except Exception as e:
+            print(f"Error updating report rollups: {e}")
+            return False
+
+    def rebuild_report_rollups(self):
+        """Recompute every rollup from pollution_reports (backfill or repair)"""
+        try:
+            rollups = {}
+            projection = {'timestamp': 1, 'reported_at': 1, 'stored_at': 1, 'severity': 1, 'status': 1,
+                          'location': 1, 'location_name': 1, 'pollution_type': 1}
+            for report in self.pollution_reports.find({}, projection):
+                increments = report_rollup_increments(report)
+                for granularity, period, period_start in report_rollup_periods(_report_time(report)):
+                    rollup = rollups.setdefault(f"{granularity}:{period}", {
+                        '_id': f"{granularity}:{period}",
+                        'granularity': granularity,
+                        'period': period,
+                        'period_start': period_start
+                    })
+                    for field, amount in increments.items():
+                        group, _, key = field.partition('.')
+                        if key:
+                            bucket = rollup.setdefault(group, {})
+                            bucket[key] = bucket.get(key, 0) + amount
+                        else:
+                            rollup[group] = rollup.get(group, 0) + amount
+            self.report_rollups.delete_many({})
+            if rollups:
+                self.report_rollups.insert_many(list(rollups.values()))
+            dashboard_cache.invalidate(*REPORT_CACHE_KEYS)
+            return len(rollups)
+        except Exception as e:
+            print(f"Error rebuilding report rollups: {e}")
+            return 0
+
+    def bootstrap_report_rollups(self):
+        """Backfill rollups once when reports exist but no rollups do"""
+        try:
+            if self.report_rollups.estimated_document_count() == 0 and self.pollution_reports.estimated_document_count() > 0:
+                return self.rebuild_report_rollups()
+            return 0
+        except Exception as e:
+            print(f"Error bootstrapping report rollups: {e}")
+            return 0
+
     def initialize_sample_data(self):
         """Initialize sample sensor data if database is empty"""
         try:
@@ -489,8 +1436,11 @@ class MongoDBManager:
                 "temperature": round(15 + uniform(-5, 15), 1),
                 "turbidity": round(pollution_level * 10 + randint(0, 50), 1)
             })
+        for sensor in sensors:
+            sensor.update(spatial_fields(sensor))
         self.sensors.delete_many({})
         self.sensors.insert_many(sensors)
+        self.rebuild_sensor_latest()
         print(f"Seeded {len(sensors)} sensors.")
         # --- Cleanup Missions ---
         missions = []
@@ -527,6 +1477,7 @@ class MongoDBManager:
             })
         self.pollution_reports.delete_many({})
         self.pollution_reports.insert_many(reports)
+        self.rebuild_report_rollups()
         print(f"Seeded {len(reports)} citizen reports.")
         # --- Campaigns ---
         campaigns = []
@@ -544,6 +1495,159 @@ class MongoDBManager:
         self.campaigns.insert_many(campaigns)
         print(f"Seeded {len(campaigns)} campaigns.")
 
+    def get_documents(self, collection_name, query=None, projection=None, limit=0):
+        """Get documents from ``collection_name`` with ``_id`` as a string"""
+        try:
+            cursor = self.db[collection_name].find(query or {}, resolve_projection(projection)).limit(limit)
+            documents = list(cursor)
+            for document in documents:
+                if '_id' in document:
+                    document['_id'] = str(document['_id'])
+            return documents
+        except Exception as e:
+            print(f"Error retrieving {collection_name}: {e}")
+            return []
+
+    def iter_raw_batches(self, collection_name, query=None, projection=None, limit=0, batch_size=None):
+        """Yield undecoded BSON batches from ``collection_name`` as returned by the server.
+
+        Errors are re-raised rather than ending the stream early, so a
+        streamed response is aborted instead of looking complete.
+        """
+        try:
+            cursor = self.db[collection_name].find_raw_batches(
+                query or {}, resolve_projection(projection),
+                limit=limit, batch_size=batch_size or Config.RAW_BSON_BATCH_SIZE
+            )
+            for batch in cursor:
+                yield batch
+        except Exception as e:
+            print(f"Error streaming raw {collection_name} batches: {e}")
+            raise
+
+    def store_prediction_run(self, run, documents, keep=None):
+        """Write one materialized prediction version, then publish it in prediction_runs.
+
+        Readers only follow published runs, so a version is never served half
+        written. Versions beyond the newest ``keep`` runs are removed.
+        """
+        try:
+            if documents:
+                self.predictions.insert_many(documents, ordered=False)
+            self.prediction_runs.insert_one(dict(run))
+            keep = keep or Config.PREDICTION_VERSIONS_KEPT
+            expired = [r['version'] for r in self.prediction_runs.find({}, {'version': 1}).sort('version', -1).skip(keep)]
+            if expired:
+                self.prediction_runs.delete_many({'version': {'$in': expired}})
+                self.predictions.delete_many({'version': {'$lte': max(expired)}})
+            return len(documents)
+        except Exception as e:
+            print(f"Error storing prediction run {run.get('version')}: {e}")
+            return 0
+
+    def get_latest_prediction_run(self):
+        """Get the newest published prediction run, or None"""
+        try:
+            return self.prediction_runs.find_one({}, {'_id': 0}, sort=[('version', -1)])
+        except Exception as e:
+            print(f"Error retrieving latest prediction run: {e}")
+            return None
+
+    def get_materialized_predictions(self, version, projection=None):
+        """Get the prediction documents of one run, ordered by region and horizon"""
+        try:
+            cursor = self.predictions.find({'version': version}, resolve_projection(projection)).sort(
+                [('region', ASCENDING), ('horizon_days', ASCENDING)]
+            )
+            predictions = list(cursor)
+            for prediction in predictions:
+                if '_id' in prediction:
+                    prediction['_id'] = str(prediction['_id'])
+            return predictions
+        except Exception as e:
+            print(f"Error retrieving materialized predictions: {e}")
+            return []
+
+    def get_data_lake_days(self, bucket, prefix):
+        """Cached per-day summaries of a data lake prefix as ``{day: summary}``"""
+        try:
+            cursor = self.data_lake_days.find({'bucket': bucket, 'prefix': prefix},
+                                              {'_id': 0, 'day': 1, 'files': 1, 'bytes': 1, 'file_types': 1})
+            return {document.pop('day'): document for document in cursor}
+        except Exception as e:
+            print(f"Error retrieving data lake day summaries: {e}")
+            return {}
+
+    def store_data_lake_days(self, bucket, prefix, days):
+        """Upsert per-day summaries (``{day: summary}``) of a data lake prefix"""
+        try:
+            scanned_at = datetime.now()
+            operations = [
+                UpdateOne(
+                    {'bucket': bucket, 'prefix': prefix, 'day': day},
+                    {'$set': dict(summary, scanned_at=scanned_at)},
+                    upsert=True
+                )
+                for day, summary in days.items()
+            ]
+            if operations:
+                self.data_lake_days.bulk_write(operations, ordered=False)
+            return len(operations)
+        except Exception as e:
+            print(f"Error storing data lake day summaries: {e}")
+            return 0
+
+    def get_export_watermark(self, name):
+        """Progress of a data lake export: ``{'_id': name, 'last_id', 'records', 'updated_at'}``.
+
+        Returns None only when the export has never run; read errors are
+        raised so a failed lookup cannot restart the export from the beginning.
+        """
+        return self.export_watermarks.find_one({'_id': name})
+
+    def acquire_export_lease(self, name, owner, seconds):
+        """Lease an export for ``seconds``; returns its watermark document, or None while another run holds it"""
+        now = datetime.now()
+        try:
+            return self.export_watermarks.find_one_and_update(
+                {'_id': name, '$or': [{'lease_until': {'$exists': False}}, {'lease_until': {'$lt': now}}]},
+                {'$set': {'lease_owner': owner, 'lease_until': now + timedelta(seconds=seconds)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # The watermark exists but its lease has not expired
+            return None
+
+    def renew_export_lease(self, name, owner, seconds):
+        """Extend a held export lease; raises if it expired and was taken over"""
+        result = self.export_watermarks.update_one(
+            {'_id': name, 'lease_owner': owner},
+            {'$set': {'lease_until': datetime.now() + timedelta(seconds=seconds)}}
+        )
+        if result.matched_count == 0:
+            raise RuntimeError(f"Export lease {name} was lost")
+
+    def release_export_lease(self, name, owner):
+        """Give up an export lease without moving the watermark"""
+        self.export_watermarks.update_one(
+            {'_id': name, 'lease_owner': owner},
+            {'$unset': {'lease_owner': '', 'lease_until': ''}}
+        )
+
+    def set_export_watermark(self, name, owner, last_id, records):
+        """Advance an export's watermark to ``last_id`` after its files are uploaded and release its lease"""
+        result = self.export_watermarks.update_one(
+            {'_id': name, 'lease_owner': owner},
+            {
+                '$set': {'last_id': last_id, 'updated_at': datetime.now()},
+                '$inc': {'records': records},
+                '$unset': {'lease_owner': '', 'lease_until': ''}
+            }
+        )
+        if result.matched_count == 0:
+            raise RuntimeError(f"Export lease {name} was lost before the watermark was stored")
+
     def get_cleanup_data(self):
         """Aggregate cleanup mission data for dashboard/API."""
         try:
@@ -552,7 +1656,9 @@ class MongoDBManager:
             hotspots_addressed = 0
             active_missions = 0
             next_deployment = None
-            missions = list(self.cleanup_logs.find())
+            missions = list(self.cleanup_logs.find({}, {
+                'robots': 1, 'status': 1, 'waste_collected': 1, 'next_deployment': 1
+            }))
             for mission in missions:
                 r = mission.get('robots', {})
                 robots['ocean_drones'] += r.get('ocean_drones', 0)
@@ -585,7 +1691,7 @@ class MongoDBManager:
 # Initialize MongoDB manager
 mongodb = MongoDBManager()
 
-# Auto-seed DB if empty
-if mongodb.sensors.count_documents({}) == 0:
+# Auto-seed DB if empty (scripts pointed at other databases turn this off)
+if Config.AUTO_SEED and mongodb.sensors.count_documents({}) == 0:
     print("Seeding MongoDB with initial data...")
     mongodb.seed_db()
@@ -1,63 +1,98 @@
-from flask import render_template, request, jsonify, redirect, url_for, send_file
+from flask import render_template, request, jsonify, redirect, url_for, send_file, Response, stream_with_context
 from app import app
-from aws_services import aws_services
-from models import mongodb
+from aws_services import aws_services, REKOGNITION_MAX_IMAGE_BYTES
+from models import mongodb, exclude_fields, REPORT_PAYLOAD_FIELDS, SENSOR_BUCKET_FIELDS
+from ingestion import sensor_ingestion
+from snapshot import get_dashboard_snapshot, hotspot_entry
+from geo import cluster_hotspots, geohash_bounds, geohash_precision_for_zoom
+from jobs import ai_jobs
+from materialization import describe_run
+from timeseries import parse_resolution, auto_resolution, lttb, naive_utc
+from data_lake import stream_size
+from config import Config
 import json
 import base64
-from datetime import datetime
-from bson import ObjectId
+import itertools
+from datetime import datetime, timedelta
 from markupsafe import Markup
 import time
 import os
 from werkzeug.utils import secure_filename
 
-def serialize_mongo_data(data):
-    """Convert MongoDB data to JSON-serializable format"""
-    if isinstance(data, list):
-        return [serialize_mongo_data(item) for item in data]
-    elif isinstance(data, dict):
-        return {key: serialize_mongo_data(value) for key, value in data.items()}
-    elif isinstance(data, ObjectId):
-        return str(data)
-    elif hasattr(data, 'isoformat'):  # datetime objects
-        return data.isoformat()
-    else:
-        return data
+AI_ANALYSIS_PENDING_HTML = "<p><strong>🤖 AI Analysis:</strong> <em>Generating insights from the latest sensor data...</em></p>"
+AI_ANALYSIS_UNAVAILABLE_HTML = "<p><strong>🤖 AI Analysis:</strong> Temporarily unavailable. Monitoring systems continue to collect data...</p>"
+
+# Default projections for list endpoints: only the fields their views render.
+# Callers can override with ``?fields=a,b`` or ask for whole documents with ``?fields=*``.
+SENSOR_MAP_FIELDS = ('id', 'location', 'lat', 'lng', 'pollution_level', 'microplastics', 'status', 'timestamp')
+REPORT_LIST_PROJECTION = exclude_fields(*REPORT_PAYLOAD_FIELDS)
+
+def raw_json_response(collection_name, query=None, projection=None, limit=0):
+    """Stream a JSON array straight from raw BSON batches (``?raw=1`` on list endpoints)"""
+    batches = mongodb.iter_raw_batches(collection_name, query, projection, limit)
+    # Fetch the first batch up front so a failing query raises here, before streaming starts
+    first = next(batches, None)
+    if first is not None:
+        batches = itertools.chain([first], batches)
+    return Response(stream_with_context(app.json.iter_raw_batches(batches)), mimetype='application/json')
+
+def wants_raw():
+    """Whether the caller opted into the raw BSON passthrough"""
+    return request.args.get('raw', '').lower() in ('1', 'true', 'yes')
+
+def parse_floats(value, count, name):
+    """Parse ``count`` comma-separated floats from a query parameter"""
+    try:
+        numbers = [float(part) for part in value.split(',')]
+    except ValueError:
+        numbers = []
+    if len(numbers) != count:
+        raise ValueError(f"{name} must be {count} comma-separated numbers")
+    return numbers
+
+def requested_projection(default=None):
+    """Projection from the ``fields`` query parameter, falling back to ``default``"""
+    fields = request.args.get('fields')
+    if not fields:
+        return default
+    if fields.strip() == '*':
+        return None
+    return [field.strip() for field in fields.split(',') if field.strip()]
 
 @app.route('/')
 def index():
     """Main dashboard page"""
     # Get real-time data first (most important)
     try:
-        sensor_data = aws_services.get_iot_sensor_data()
-        predictions = aws_services.get_prediction_data()
-        cleanup_data = aws_services.get_cleanup_coordination()
+        snapshot = get_dashboard_snapshot()
+        sensor_data = snapshot.sensors
+        predictions = snapshot.predictions
+        cleanup_data = snapshot.cleanup
         
-        # Store sensor data in MongoDB
-        mongodb.store_sensor_data(sensor_data)
+        # Queue sensor data for background storage in MongoDB
+        sensor_ingestion.enqueue(sensor_data)
         
         # Get statistics
-        stats = mongodb.get_pollution_statistics()
+        stats = snapshot.statistics
         
-        # Get AI analysis from Bedrock (this might take time, so handle gracefully)
+        # Get AI analysis from Bedrock without blocking the page: serve a cached
+        # result if there is one, otherwise render a placeholder and let the
+        # browser poll the background job
+        ai_analysis_job = None
         try:
-            ai_analysis = aws_services.invoke_bedrock_analysis(sensor_data)
+            ai_analysis_job, ai_analysis = submit_ai_analysis(sensor_data)
         except Exception as e:
             print(f"AI analysis failed: {e}")
-            ai_analysis = "<p><strong>🤖 AI Analysis:</strong> Temporarily unavailable. Monitoring systems continue to collect data...</p>"
-        
-        # Serialize all data for JSON compatibility
-        sensor_data_clean = serialize_mongo_data(sensor_data)
-        predictions_clean = serialize_mongo_data(predictions)
-        cleanup_data_clean = serialize_mongo_data(cleanup_data)
-        stats_clean = serialize_mongo_data(stats)
+            ai_analysis = AI_ANALYSIS_UNAVAILABLE_HTML
         
+        # tojson in the template encodes ObjectId/datetime values via app.json
         return render_template('index.html', 
-                             sensor_data=sensor_data_clean,
-                             predictions=predictions_clean,
-                             cleanup_data=cleanup_data_clean,
-                             stats=stats_clean,
-                             ai_analysis=Markup(ai_analysis))
+                             sensor_data=sensor_data,
+                             predictions=predictions,
+                             cleanup_data=cleanup_data,
+                             stats=stats,
+                             ai_analysis=Markup(ai_analysis),
+                             ai_analysis_job=ai_analysis_job)
     except Exception as e:
         print(f"Error loading dashboard: {e}")
         # Return a basic dashboard with error message
@@ -70,47 +105,177 @@ def index():
 
 @app.route('/api/sensor-data')
 def api_sensor_data():
-    """Return all sensor/device data from MongoDB (up to 200 for map)."""
+    """Return sensor/device data from MongoDB for the map.
+
+    With ``bbox=west,south,east,north`` and ``zoom`` the latest reading of each
+    sensor in the viewport is returned as ``{'mode': 'points', 'points'}``, or
+    once there are more than MAP_MAX_POINTS below MAP_POINTS_MIN_ZOOM as
+    ``{'mode': 'clusters', 'clusters'}`` aggregated per geohash cell. Without a
+    bbox up to 200 documents are returned as a plain array.
+    """
     try:
-        sensors = list(mongodb.sensors.find().limit(200))
-        for s in sensors:
-            s['_id'] = str(s['_id'])
+        projection = requested_projection(SENSOR_MAP_FIELDS)
+        if request.args.get('bbox'):
+            try:
+                west, south, east, north = parse_floats(request.args['bbox'], 4, 'bbox')
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            zoom = request.args.get('zoom', 2, type=int)
+            precision = geohash_precision_for_zoom(zoom)
+            view = mongodb.get_sensor_map_view(south, west, north, east, precision, projection)
+            response = {'zoom': zoom, 'precision': precision, 'total': view['total']}
+            if view['total'] <= Config.MAP_MAX_POINTS or zoom >= Config.MAP_POINTS_MIN_ZOOM:
+                response.update(mode='points', points=view['points'], truncated=view['total'] > len(view['points']))
+            else:
+                clusters = []
+                for cell in view['cells']:
+                    cell_south, cell_west, cell_north, cell_east = geohash_bounds(cell['_id'])
+                    clusters.append({
+                        'geohash': cell['_id'],
+                        'count': cell['count'],
+                        'mean_level': round(cell['mean_level'] or 0, 2),
+                        'max_level': cell['max_level'],
+                        'lat': cell['lat'],
+                        'lng': cell['lng'],
+                        'bounds': [cell_west, cell_south, cell_east, cell_north]
+                    })
+                response.update(mode='clusters', clusters=clusters, truncated=sum(c['count'] for c in clusters) < view['total'])
+            return jsonify(response)
+        if wants_raw():
+            return raw_json_response('sensors', projection=projection, limit=200)
+        sensors = mongodb.get_documents('sensors', projection=projection, limit=200)
         return jsonify(sensors)
     except Exception as e:
         print(f"Error in /api/sensor-data: {e}")
         return jsonify([])
 
+@app.route('/api/sensor-history')
+def api_sensor_history():
+    """Windowed statistics for one sensor (``sensor_id``) or a ``region`` over time.
+
+    ``start``/``end`` are ISO times (default: the last 7 days). ``resolution``
+    is a window length such as ``15m``, ``1h`` or ``1d``; without it the
+    window is picked so the range spans about HISTORY_TARGET_WINDOWS windows.
+    ``field`` picks the measurement and ``percentiles=0`` skips p50/p90/p95.
+    With ``downsample=lttb`` the window means are reduced to ``points``
+    visually representative ``[time, value]`` pairs instead.
+    """
+    try:
+        sensor_id = request.args.get('sensor_id')
+        region = request.args.get('region')
+        field = request.args.get('field', 'pollution_level')
+        if bool(sensor_id) == bool(region):
+            return jsonify({'error': 'Provide exactly one of sensor_id or region'}), 400
+        if field not in SENSOR_BUCKET_FIELDS:
+            return jsonify({'error': f"field must be one of {', '.join(SENSOR_BUCKET_FIELDS)}"}), 400
+        try:
+            # Aware and naive times can't be compared, so both become naive UTC
+            end = naive_utc(datetime.fromisoformat(request.args['end'])) if request.args.get('end') else datetime.now()
+            start = naive_utc(datetime.fromisoformat(request.args['start'])) if request.args.get('start') else end - timedelta(days=7)
+            downsample = request.args.get('downsample')
+            points = request.args.get('points', 500, type=int)
+            if downsample == 'lttb' and points < 3:
+                raise ValueError('points must be at least 3 for lttb downsampling')
+            target = Config.HISTORY_MAX_WINDOWS if downsample == 'lttb' else Config.HISTORY_TARGET_WINDOWS
+            if request.args.get('resolution'):
+                resolution = parse_resolution(request.args['resolution'])
+            else:
+                resolution = auto_resolution(start, end, target)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if start >= end:
+            return jsonify({'error': 'start must be before end'}), 400
+        if (end - start).total_seconds() / resolution > Config.HISTORY_MAX_WINDOWS:
+            return jsonify({'error': f"Range needs more than {Config.HISTORY_MAX_WINDOWS} windows; use a coarser resolution"}), 400
+
+        windows = mongodb.get_sensor_history(
+            start, end, resolution, sensor_id=sensor_id, region=region, field=field,
+            percentiles=downsample != 'lttb' and request.args.get('percentiles', '1') != '0'
+        )
+        result = {
+            'sensor_id': sensor_id,
+            'region': region,
+            'field': field,
+            'start': start,
+            'end': end,
+            'resolution_seconds': resolution
+        }
+        if downsample == 'lttb':
+            series = [(w['start'].timestamp(), w['mean'], w['start']) for w in windows]
+            result['points'] = [[t, value] for _, value, t in lttb(series, points)]
+        else:
+            result['windows'] = windows
+        return jsonify(result)
+    except Exception as e:
+        print(f"Error in /api/sensor-history: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/predictions')
 def api_predictions():
-    """Return pollution prediction data from MongoDB (or ML model in future)."""
+    """Return the latest materialized predictions with their version and staleness.
+
+    With ``?raw=1`` the body is the bare document array and the run details
+    are sent as ``X-Predictions-*`` headers.
+    """
     try:
-        predictions = list(mongodb.predictions.find().limit(200))
-        for p in predictions:
-            p['_id'] = str(p['_id'])
-        return jsonify(predictions)
+        run = mongodb.get_latest_prediction_run()
+        details = describe_run(run)
+        if wants_raw():
+            query = {'version': run['version']} if run else {'version': None}
+            response = raw_json_response('predictions', query, projection=requested_projection())
+            response.headers['X-Predictions-Version'] = str(details['version'] or '')
+            response.headers['X-Predictions-Age'] = str(details['age_seconds'] or '')
+            response.headers['X-Predictions-Stale'] = 'true' if details['stale'] else 'false'
+            return response
+        predictions = mongodb.get_materialized_predictions(run['version'], requested_projection()) if run else []
+        return jsonify(dict(details, predictions=predictions))
     except Exception as e:
         print(f"Error in /api/predictions: {e}")
-        return jsonify([])
+        return jsonify(dict(describe_run(None), predictions=[]))
 
 @app.route('/api/cleanup-status')
 def api_cleanup_status():
     """Return cleanup coordination data from MongoDB."""
     try:
-        cleanup = list(mongodb.cleanup_logs.find().limit(50))
-        for c in cleanup:
-            c['_id'] = str(c['_id'])
+        if wants_raw():
+            return raw_json_response('cleanup_logs', projection=requested_projection(), limit=50)
+        cleanup = mongodb.get_documents('cleanup_logs', projection=requested_projection(), limit=50)
         return jsonify(cleanup)
     except Exception as e:
         print(f"Error in /api/cleanup-status: {e}")
         return jsonify([])
 
+def submit_ai_analysis(sensor_data):
+    """Return ``(job_id, html)``: cached analysis with no job, or a placeholder and a job id"""
+    cache_key, cached = aws_services.peek_bedrock_analysis(sensor_data)
+    if cached is not None:
+        return None, cached
+    # Failures raise, so the job reports 'failed' instead of a fallback result
+    job_id = ai_jobs.submit(aws_services.fetch_bedrock_analysis, sensor_data, key=cache_key)
+    return job_id, AI_ANALYSIS_PENDING_HTML
+
 @app.route('/api/ai-analysis')
 def api_ai_analysis():
-    """API endpoint for AI analysis"""
-    sensor_data = aws_services.get_iot_sensor_data()
+    """API endpoint for AI analysis (``?async=1`` returns a job id instead of waiting)"""
+    sensor_data = get_dashboard_snapshot().sensors
+    if request.args.get('async') == '1':
+        job_id, analysis = submit_ai_analysis(sensor_data)
+        return jsonify({'job_id': job_id, 'status': 'pending' if job_id else 'done', 'analysis': analysis, 'html': analysis})
     analysis = aws_services.invoke_bedrock_analysis(sensor_data)
     return jsonify({'analysis': analysis, 'html': analysis})
 
+@app.route('/api/ai-analysis/jobs/<job_id>')
+def api_ai_analysis_job(job_id):
+    """Poll a background AI analysis job"""
+    job = ai_jobs.status(job_id)
+    if job['status'] == 'done':
+        job['analysis'] = job['html'] = job.pop('result')
+    elif job['status'] in ('failed', 'timeout'):
+        job['analysis'] = job['html'] = AI_ANALYSIS_UNAVAILABLE_HTML
+    elif job['status'] == 'unknown':
+        return jsonify(job), 404
+    return jsonify(job)
+
 @app.route('/api/synthesize-speech', methods=['POST'])
 def api_synthesize_speech():
     """API endpoint for text-to-speech synthesis"""
@@ -177,17 +342,22 @@ def submit_report():
                 os.makedirs(uploads_dir, exist_ok=True)
                 filename = secure_filename(image_file.filename)
                 image_path = os.path.join(uploads_dir, filename)
-                image_file.save(image_path)
                 report_data['image_path'] = f'uploads/{filename}'
-                # Analyze the image and store the result
-                try:
-                    image_file.seek(0)
-                    image_bytes = open(image_path, 'rb').read()
-                    labels = aws_services.analyze_image(image_bytes)
-                    report_data['image_analysis'] = labels
-                except Exception as img_e:
-                    print(f"Image analysis failed: {img_e}")
+                if stream_size(image_file.stream) > REKOGNITION_MAX_IMAGE_BYTES:
+                    # Too large to analyze inline; copy it to disk in chunks
+                    image_file.save(image_path)
                     report_data['image_analysis'] = []
+                else:
+                    # Read the upload once, for both the saved copy and the analysis
+                    image_bytes = image_file.read()
+                    with open(image_path, 'wb') as saved:
+                        saved.write(image_bytes)
+                    try:
+                        labels = aws_services.analyze_image(image_bytes)
+                        report_data['image_analysis'] = labels
+                    except Exception as img_e:
+                        print(f"Image analysis failed: {img_e}")
+                        report_data['image_analysis'] = []
 
         # Prepare location fields for MongoDB geo index compatibility
         location_name = request.form.get('location')
@@ -208,11 +378,12 @@ def submit_report():
 @app.route('/dashboard-data')
 def dashboard_data():
     """Get comprehensive dashboard data"""
+    snapshot = get_dashboard_snapshot()
     return jsonify({
-        'sensors': aws_services.get_iot_sensor_data(),
-        'predictions': aws_services.get_prediction_data(),
-        'cleanup': aws_services.get_cleanup_coordination(),
-        'statistics': mongodb.get_pollution_statistics(),
+        'sensors': snapshot.sensors,
+        'predictions': snapshot.predictions,
+        'cleanup': snapshot.cleanup,
+        'statistics': snapshot.statistics,
         'timestamp': datetime.now().isoformat()
     })
 
@@ -221,6 +392,11 @@ def api_aws_services_status():
     """Get comprehensive AWS services status"""
     return jsonify(aws_services.get_comprehensive_aws_status())
 
+@app.route('/api/index-report')
+def api_index_report():
+    """Report the query plan of each registered MongoDB query"""
+    return jsonify(mongodb.explain_queries())
+
 @app.route('/api/iot-sensors')
 def api_iot_sensors():
     """Get IoT sensors list"""
@@ -289,13 +465,21 @@ def api_create_data_lake():
 
 @app.route('/api/upload-pollution-data', methods=['POST'])
 def api_upload_pollution_data():
-    """Upload pollution data to S3"""
-    data = request.get_json()
-    bucket_name = data.get('bucket_name')
-    pollution_data = data.get('data', {})
-    data_type = data.get('data_type', 'sensor_data')
+    """Upload pollution data to S3, streaming multipart file uploads"""
+    content_type = None
+    if 'file' in request.files:
+        upload = request.files['file']
+        bucket_name = request.form.get('bucket_name')
+        data_type = request.form.get('data_type', 'sensor_data')
+        pollution_data = upload.stream
+        content_type = upload.mimetype
+    else:
+        data = request.get_json()
+        bucket_name = data.get('bucket_name')
+        pollution_data = data.get('data', {})
+        data_type = data.get('data_type', 'sensor_data')
     
-    result = aws_services.upload_pollution_data(bucket_name, pollution_data, data_type)
+    result = aws_services.upload_pollution_data(bucket_name, pollution_data, data_type, content_type)
     if result:
         return jsonify(result)
     else:
@@ -307,13 +491,42 @@ def api_create_backup():
     data = request.get_json()
     source_bucket = data.get('source_bucket')
     backup_bucket = data.get('backup_bucket')
+    snapshot_id = data.get('snapshot_id')  # resume an interrupted backup
     
-    result = aws_services.create_backup_snapshot(source_bucket, backup_bucket)
+    result = aws_services.create_backup_snapshot(source_bucket, backup_bucket, snapshot_id)
     if result:
-        return jsonify(result)
+        return jsonify(result), 200 if result['status'] == 'completed_simulated' else 202
     else:
         return jsonify({'error': 'Failed to create backup'}), 500
 
+@app.route('/api/backups/<backup_bucket>/<snapshot_id>')
+def api_backup_status(backup_bucket, snapshot_id):
+    """Poll a backup snapshot started by /api/create-backup (``?job_id=`` adds the job status)"""
+    try:
+        result = aws_services.get_backup_status(backup_bucket, snapshot_id, request.args.get('job_id'))
+    except Exception as e:
+        print(f"Error getting backup status for {snapshot_id}: {e}")
+        return jsonify({'error': str(e)}), 500
+    if result:
+        return jsonify(result)
+    else:
+        return jsonify({'error': 'Backup snapshot not found'}), 404
+
+@app.route('/api/export-sensor-data', methods=['POST'])
+def api_export_sensor_data():
+    """Export new sensor readings to the S3 data lake"""
+    data = request.get_json()
+    bucket_name = data.get('bucket_name')
+    limit = data.get('limit')
+    
+    result = aws_services.export_sensor_data(bucket_name, limit)
+    if result and result['status'] == 'in_progress':
+        return jsonify({**result, 'error': 'An export for this bucket is already running'}), 409
+    if result:
+        return jsonify(result)
+    else:
+        return jsonify({'error': 'Failed to export sensor data'}), 500
+
 @app.route('/api/data-analytics/<bucket_name>')
 def api_data_analytics(bucket_name):
     """Get analytics on stored data"""
@@ -373,7 +586,7 @@ def api_transcribe_audio():
             job_name = request.form.get('job_name')
             language_code = request.form.get('language_code', 'en-US')
             
-            audio_data = audio_file.read()
+            audio_data = audio_file.stream
             result = aws_services.create_transcription_job(audio_data, job_name, language_code)
         else:
             # Handle JSON request for demo
@@ -401,7 +614,7 @@ def api_multi_language_transcribe():
             audio_file = request.files['audio']
             language_codes = request.form.get('language_codes', 'en-US,es-US,fr-CA').split(',')
             
-            audio_data = audio_file.read()
+            audio_data = audio_file.stream
             result = aws_services.process_multi_language_audio(audio_data, language_codes)
         else:
             # Handle JSON request for demo
@@ -426,7 +639,7 @@ def api_identify_speakers():
         # Check if audio file is provided
         if 'audio' in request.files:
             audio_file = request.files['audio']
-            audio_data = audio_file.read()
+            audio_data = audio_file.stream
         else:
             # Handle JSON request for demo
             audio_data = b'demo audio data for speaker identification'
@@ -448,7 +661,7 @@ def api_voice_report_transcription():
             audio_file = request.files['audio']
             location = request.form.get('location')
             
-            audio_data = audio_file.read()
+            audio_data = audio_file.stream
         else:
             # Handle JSON request for demo
             data = request.get_json() or {}
@@ -488,66 +701,111 @@ def api_recreate_demo_services():
 
 @app.route('/api/citizen-reports')
 def api_citizen_reports():
-    """Get all citizen pollution reports"""
+    """Get citizen pollution reports one page at a time, newest first.
+
+    With ``page_size`` or ``cursor`` the response is ``{'reports', 'next_cursor'}``.
+    Without them the first page is returned as a plain array (for existing
+    clients) and the continuation token is sent in the ``X-Next-Cursor`` header.
+    """
     try:
-        reports = mongodb.get_all_reports()
-        return jsonify(serialize_mongo_data(reports))
+        page_size = request.args.get('page_size', type=int)
+        cursor = request.args.get('cursor')
+        if page_size is not None and page_size < 1:
+            return jsonify({'error': 'page_size must be at least 1'}), 400
+        try:
+            reports, next_cursor = mongodb.get_reports_page(
+                page_size=page_size, cursor=cursor,
+                projection=requested_projection(REPORT_LIST_PROJECTION)
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if page_size is None and cursor is None:
+            response = jsonify(reports)
+            if next_cursor:
+                response.headers['X-Next-Cursor'] = next_cursor
+            return response
+        return jsonify({'reports': reports, 'next_cursor': next_cursor})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/citizen-reports.ndjson')
+def api_citizen_reports_ndjson():
+    """Stream every citizen report as newline-delimited JSON for bulk consumers"""
+    projection = requested_projection(REPORT_LIST_PROJECTION)
+
+    def generate():
+        for report in mongodb.iter_reports(projection=projection):
+            yield app.json.dumps(report) + '\n'
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/api/ai-alerts')
 def api_ai_alerts():
-    """Get AI-generated pollution alerts from real sensor data only, return as array for frontend compatibility. Each alert includes an agent recommendation in HTML."""
+    """Get active AI-generated pollution alerts from the alerts collection, return as array for frontend compatibility. Each alert includes an agent recommendation in HTML."""
     try:
-        sensor_data = aws_services.get_iot_sensor_data()
-        alerts = []
-        for sensor in sensor_data:
-            if sensor['pollution_level'] > 7:
-                # Compose a prompt for the agent
-                prompt = (
-                    f"A pollution alert has been triggered for {sensor['location']} with a pollution level of {sensor['pollution_level']}. "
-                    "Provide a concise, actionable HTML recommendation (3-4 lines, use <p> tags, include relevant emojis) for authorities and cleanup teams. "
-                    "Focus on immediate actions, resource deployment, and community notification."
-                )
-                agent_result = aws_services.invoke_bedrock_agent('pollution-agent', prompt)
-                recommendation_html = agent_result['response'] if agent_result and 'response' in agent_result else "<p><strong>⚠️ No recommendation available.</strong></p>"
-                alerts.append({
-                    'id': f"alert-{sensor['id']}",
-                    'location': sensor['location'],
-                    'pollution_level': sensor['pollution_level'],
-                    'severity': 'high' if sensor['pollution_level'] > 8 else 'medium',
-                    'message': f"High pollution detected in {sensor['location']}",
-                    'timestamp': sensor['timestamp'],
-                    'actions_required': ['deploy_cleanup_units', 'notify_authorities'],
-                    'recommendation_html': recommendation_html
-                })
-        return jsonify(alerts)
+        alerts = mongodb.get_active_alerts()
+        # Only alerts that were opened or changed since their last recommendation need the agent
+        prompts = {
+            alert['alert_id']: (
+                f"A pollution alert has been triggered for {alert['location']} with a pollution level of {alert['pollution_level']}. "
+                "Provide a concise, actionable HTML recommendation (3-4 lines, use <p> tags, include relevant emojis) for authorities and cleanup teams. "
+                "Focus on immediate actions, resource deployment, and community notification."
+            )
+            for alert in alerts if not alert.get('recommendation_html')
+        }
+        mode = request.args.get('mode', Config.AI_ALERTS_MODE)
+        if not prompts:
+            recommendations = {}
+        elif mode == 'batch':
+            recommendations = aws_services.invoke_bedrock_agent_batch('pollution-agent', prompts)
+        else:
+            agent_results = aws_services.invoke_bedrock_agent_many('pollution-agent', prompts)
+            recommendations = {
+                alert_id: result['response'] if result and 'response' in result else None
+                for alert_id, result in agent_results.items()
+            }
+        mongodb.set_alert_recommendations(recommendations)
+        response = []
+        for alert in alerts:
+            recommendation_html = alert.get('recommendation_html') or recommendations.get(alert['alert_id'])
+            response.append({
+                'id': alert['alert_id'],
+                'location': alert['location'],
+                'pollution_level': alert['pollution_level'],
+                'severity': alert['severity'],
+                'message': alert['message'],
+                'timestamp': alert['timestamp'],
+                'actions_required': alert['actions_required'],
+                'recommendation_html': recommendation_html or "<p><strong>⚠️ No recommendation available.</strong></p>",
+                'recommendation_status': 'ok' if recommendation_html else 'unavailable'
+            })
+        return jsonify(response)
     except Exception as e:
         return jsonify({'error': str(e)})
 
 @app.route('/api/ai-alert/<alert_id>')
 def api_ai_alert_detail(alert_id):
-    """Get specific AI alert details from real data only"""
+    """Get specific AI alert details from the alerts collection"""
     try:
-        # Try to find the alert in real sensor data
-        sensor_data = aws_services.get_iot_sensor_data()
-        for sensor in sensor_data:
-            if f"alert-{sensor['id']}" == alert_id:
-                return jsonify({
-                    'id': alert_id,
-                    'location': sensor['location'],
-                    'pollution_level': sensor['pollution_level'],
-                    'severity': 'high' if sensor['pollution_level'] > 8 else 'medium',
-                    'message': 'Critical pollution levels detected' if sensor['pollution_level'] > 8 else 'High pollution detected',
-                    'timestamp': sensor['timestamp'],
-                    'actions_required': ['deploy_cleanup_units', 'notify_authorities'],
-                    'ai_analysis': 'High concentration of microplastics detected. Immediate cleanup required.' if sensor['pollution_level'] > 8 else 'Elevated pollution detected. Monitoring recommended.',
-                    'recommendations': [
-                        'Deploy ocean drones to affected area',
-                        'Activate surface vessels for debris collection',
-                        'Notify local authorities and environmental agencies'
-                    ]
-                })
+        alert = mongodb.get_alert(alert_id)
+        if alert:
+            high = alert['severity'] == 'high'
+            return jsonify({
+                'id': alert_id,
+                'location': alert['location'],
+                'pollution_level': alert['pollution_level'],
+                'severity': alert['severity'],
+                'status': alert['status'],
+                'message': 'Critical pollution levels detected' if high else 'High pollution detected',
+                'timestamp': alert['timestamp'],
+                'actions_required': alert['actions_required'],
+                'ai_analysis': 'High concentration of microplastics detected. Immediate cleanup required.' if high else 'Elevated pollution detected. Monitoring recommended.',
+                'recommendations': [
+                    'Deploy ocean drones to affected area',
+                    'Activate surface vessels for debris collection',
+                    'Notify local authorities and environmental agencies'
+                ],
+                'history': alert.get('history', [])
+            })
         return jsonify({'error': 'Alert not found'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -557,58 +815,18 @@ def api_data_lake_insights():
     """Get comprehensive data lake insights"""
     try:
         # Get real data from MongoDB and AWS services
-        sensor_data = aws_services.get_iot_sensor_data()
-        predictions = aws_services.get_prediction_data()
-        cleanup_data = aws_services.get_cleanup_coordination()
-        
-        # Analyze sensor data for trends and hotspots
-        pollution_stats = mongodb.get_pollution_statistics()
+        snapshot = get_dashboard_snapshot()
+        sensor_data = snapshot.sensors
+        predictions = snapshot.predictions
+        cleanup_data = snapshot.cleanup
         
-        # Determine pollution trends based on real data
+        # Determine pollution trends and hotspots based on real data
         if sensor_data:
-            # Group by region and calculate trends
-            region_data = {}
-            for sensor in sensor_data:
-                location = sensor.get('location', 'Unknown')
-                if location not in region_data:
-                    region_data[location] = []
-                region_data[location].append(sensor.get('pollution_level', 5.0))
-            
-            # Categorize regions based on pollution levels
-            increasing_regions = []
-            stable_regions = []
-            improving_regions = []
-            
-            for region, levels in region_data.items():
-                if levels:
-                    avg_level = sum(levels) / len(levels)
-                    if avg_level > 7.0:
-                        increasing_regions.append(region)
-                    elif avg_level < 4.0:
-                        improving_regions.append(region)
-                    else:
-                        stable_regions.append(region)
-            
-            # Generate hotspots based on real data
-            hotspots = []
-            for region, levels in region_data.items():
-                if levels:
-                    max_level = max(levels)
-                    if max_level > 8.0:
-                        priority = 'critical'
-                    elif max_level > 6.0:
-                        priority = 'high'
-                    else:
-                        priority = 'medium'
-                    
-                    hotspots.append({
-                        'location': region,
-                        'pollution_level': round(max_level, 1),
-                        'priority': priority
-                    })
-            
-            # Sort hotspots by pollution level
-            hotspots.sort(key=lambda x: x['pollution_level'], reverse=True)
+            trends = snapshot.pollution_trends()
+            increasing_regions = trends['increasing_regions']
+            stable_regions = trends['stable_regions']
+            improving_regions = trends['improving_regions']
+            hotspots = snapshot.region_hotspots()
         else:
             # Fallback data if no sensor data available
             increasing_regions = ['Mediterranean Sea', 'Pacific Ocean']
@@ -637,6 +855,7 @@ def api_data_lake_insights():
                 'improving_regions': improving_regions
             },
             'hotspots': hotspots,
+            'hotspot_clusters': snapshot.hotspot_clusters() if sensor_data else [],
             'cleanup_effectiveness': {
                 'total_waste_collected_kg': cleanup_data.get('waste_collected_today', 0),
                 'hotspots_addressed': cleanup_data.get('hotspots_addressed', 0),
@@ -644,7 +863,7 @@ def api_data_lake_insights():
             }
         }
         
-        return jsonify(serialize_mongo_data(insights))
+        return jsonify(insights)
     except Exception as e:
         import traceback
         print('Error in /api/data-lake-insights:', e)
@@ -681,18 +900,13 @@ def api_global_impact():
     """Get global impact statistics and predictions based on MongoDB data"""
     try:
         # Get real data from MongoDB and AWS services
-        predictions = aws_services.get_prediction_data()
-        sensor_data = aws_services.get_iot_sensor_data()
+        snapshot = get_dashboard_snapshot()
+        sensor_data = snapshot.sensors
         
         # Calculate global impact based on real sensor data
         if sensor_data:
             # Group sensor data by region
-            region_data = {}
-            for sensor in sensor_data:
-                location = sensor.get('location', 'Unknown')
-                if location not in region_data:
-                    region_data[location] = []
-                region_data[location].append(sensor.get('pollution_level', 5.0))
+            region_data = snapshot.region_levels
             
             # Calculate regional analysis
             regional_analysis = []
@@ -830,25 +1044,39 @@ def api_engage_actions():
 
 @app.route('/api/hotspot-detection')
 def api_hotspot_detection():
-    """Get real-time hotspot detection data"""
+    """Get real-time hotspot detection data.
+
+    Without spatial parameters this lists hot sensors among the latest
+    readings. Spatial queries use the ``2dsphere`` index over the latest
+    reading of each sensor:
+
+    - ``bbox=west,south,east,north``
+    - ``near=lat,lng`` with ``radius_km`` and/or ``k`` for the nearest k
+
+    ``threshold`` overrides the hotspot level and ``cluster=1`` also returns
+    density clusters as ``{'hotspots': [...], 'clusters': [...]}``.
+    """
     try:
-        sensor_data = aws_services.get_iot_sensor_data()
-        hotspots = []
-        
-        for sensor in sensor_data:
-            if sensor['pollution_level'] > 6:
-                hotspots.append({
-                    'id': sensor['id'],
-                    'location': sensor['location'],
-                    'coordinates': {'lat': sensor['lat'], 'lng': sensor['lng']},
-                    'pollution_level': sensor['pollution_level'],
-                    'microplastics': sensor['microplastics'],
-                    'status': sensor['status'],
-                    'priority': 'high' if sensor['pollution_level'] > 8 else 'medium',
-                    'detected_at': sensor['timestamp'],
-                    'cleanup_units_dispatched': 2 if sensor['pollution_level'] > 8 else 1
-                })
-        
+        threshold = request.args.get('threshold', Config.HOTSPOT_THRESHOLD, type=float)
+        try:
+            if request.args.get('bbox'):
+                west, south, east, north = parse_floats(request.args['bbox'], 4, 'bbox')
+                readings = mongodb.find_hotspots_in_bbox(south, west, north, east, threshold=threshold)
+            elif request.args.get('near'):
+                lat, lng = parse_floats(request.args['near'], 2, 'near')
+                readings = mongodb.find_hotspots_near(
+                    lat, lng,
+                    radius_km=request.args.get('radius_km', type=float),
+                    k=request.args.get('k', type=int),
+                    threshold=threshold
+                )
+            else:
+                readings = [s for s in get_dashboard_snapshot().sensors if s['pollution_level'] > threshold]
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        hotspots = [hotspot_entry(reading) for reading in readings]
+        if request.args.get('cluster', '').lower() in ('1', 'true', 'yes'):
+            return jsonify({'hotspots': hotspots, 'clusters': cluster_hotspots(readings)})
         return jsonify(hotspots)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -867,10 +1095,11 @@ def api_microplastics_analytics():
 def api_cleanup_missions():
     """Get active cleanup missions data from real data only"""
     try:
-        cleanup_data = aws_services.get_cleanup_coordination()
-        missions = list(mongodb.cleanup_logs.find({'status': 'active'}))
-        for m in missions:
-            m['_id'] = str(m['_id'])
+        cleanup_data = get_dashboard_snapshot().cleanup
+        missions = mongodb.get_documents(
+            'cleanup_logs', {'status': 'active'},
+            projection=requested_projection()
+        )
         return jsonify({
             'active_missions': cleanup_data['active_missions'],
             'missions': missions,
@@ -1012,8 +1241,8 @@ def api_citizen_voice_report():
         location = request.form.get('location', '')
         reporter_info = request.form.get('reporter_info', '')
         
-        # Read audio data
-        audio_data = audio_file.read()
+        # Audio is passed on as the (spooled) upload stream
+        audio_data = audio_file.stream
         
         # Process the voice report
         try:
@@ -1073,9 +1302,7 @@ def api_citizen_chat_report():
 def api_citizen_reports_summary():
     """Return summary of citizen reports from MongoDB."""
     try:
-        reports = list(mongodb.pollution_reports.find().limit(100))
-        for r in reports:
-            r['_id'] = str(r['_id'])
+        reports = mongodb.get_documents('pollution_reports', projection=requested_projection(REPORT_LIST_PROJECTION), limit=100)
         return jsonify(reports)
     except Exception as e:
         print(f"Error in /api/citizen-reports-summary: {e}")
@@ -1146,7 +1373,7 @@ def api_citizen_report_detail(report_id):
         # Get report from MongoDB
         report = mongodb.get_citizen_report(report_id)
         if report:
-            return jsonify(serialize_mongo_data(report))
+            return jsonify(report)
         else:
             return jsonify({'error': 'Report not found'}), 404
     except Exception as e:
@@ -1157,8 +1384,8 @@ def api_citizen_report_detail(report_id):
 def api_citizen_reports_by_location(location):
     """Get citizen reports for a specific location"""
     try:
-        reports = mongodb.get_citizen_reports_by_location(location)
-        return jsonify(serialize_mongo_data(reports))
+        reports = mongodb.get_citizen_reports_by_location(location, projection=requested_projection(REPORT_LIST_PROJECTION))
+        return jsonify(reports)
     except Exception as e:
         print(f"Error getting reports by location: {e}")
         return jsonify({'error': str(e)}), 500
@@ -1167,8 +1394,8 @@ def api_citizen_reports_by_location(location):
 def api_citizen_reports_by_severity(severity):
     """Get citizen reports by severity level"""
     try:
-        reports = mongodb.get_citizen_reports_by_severity(severity)
-        return jsonify(serialize_mongo_data(reports))
+        reports = mongodb.get_citizen_reports_by_severity(severity, projection=requested_projection(REPORT_LIST_PROJECTION))
+        return jsonify(reports)
     except Exception as e:
         print(f"Error getting reports by severity: {e}")
         return jsonify({'error': str(e)}), 500
@@ -1199,7 +1426,7 @@ def api_citizen_report_analytics():
     """Get analytics for citizen reports"""
     try:
         analytics = mongodb.get_citizen_report_analytics()
-        return jsonify(serialize_mongo_data(analytics))
+        return jsonify(analytics)
     except Exception as e:
         print(f"Error getting citizen report analytics: {e}")
         return jsonify({'error': str(e)}), 500
@@ -1229,9 +1456,7 @@ def api_citizen_engagement_dashboard():
 def api_campaigns():
     """Return all campaigns from MongoDB."""
     try:
-        campaigns = list(mongodb.campaigns.find().limit(20))
-        for c in campaigns:
-            c['_id'] = str(c['_id'])
+        campaigns = mongodb.get_engagement_campaigns(projection=requested_projection(), limit=20)
         return jsonify(campaigns)
     except Exception as e:
         print(f"Error in /api/campaigns: {e}")
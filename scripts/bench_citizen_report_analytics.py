@@ -0,0 +1,98 @@
+"""Benchmark citizen report analytics: ten separate queries vs one $facet pipeline.
+
+Seeds a scratch database (``gppnn_bench`` on MONGODB_URI by default) with
+synthetic pollution reports and times both implementations at each size.
+
+    python scripts/bench_citizen_report_analytics.py --sizes 10000 100000 1000000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from random import choice, randint
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Importing models seeds an empty database with demo data; the benchmark seeds its own
+os.environ['AUTO_SEED'] = 'false'
+
+from models import mongodb  # noqa: E402
+
+
+def legacy_citizen_report_analytics(collection):
+    """The previous implementation: six aggregations and four count_documents calls"""
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    result = {}
+    for name, field in [('status_statistics', 'status'), ('severity_statistics', 'severity'),
+                        ('location_statistics', 'location'), ('pollution_type_statistics', 'pollution_type'),
+                        ('reporter_type_statistics', 'reporter_type')]:
+        result[name] = list(collection.aggregate([
+            {'$group': {'_id': f'${field}', 'count': {'$sum': 1}}},
+            {'$sort': {'count': -1}}
+        ]))
+    result['daily_statistics'] = list(collection.aggregate([
+        {'$match': {'timestamp': {'$gte': today - timedelta(days=30)}}},
+        {'$group': {
+            '_id': {'date': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$timestamp'}}},
+            'count': {'$sum': 1}
+        }},
+        {'$sort': {'_id.date': 1}}
+    ]))
+    result['total_reports'] = collection.count_documents({})
+    result['reports_today'] = collection.count_documents({'timestamp': {'$gte': today}})
+    result['reports_this_week'] = collection.count_documents({'timestamp': {'$gte': today - timedelta(days=7)}})
+    result['reports_this_month'] = collection.count_documents({'timestamp': {'$gte': today - timedelta(days=30)}})
+    return result
+
+
+def seed(collection, size, batch_size=10000):
+    """Fill ``collection`` with ``size`` synthetic reports spread over the last 60 days"""
+    collection.delete_many({})
+    now = datetime.now()
+    locations = ['Pacific Ocean', 'Atlantic Ocean', 'Mediterranean Sea', 'Indian Ocean', 'Arctic Ocean',
+                 'Baltic Sea', 'North Sea', 'Caribbean Sea', 'South China Sea', 'Gulf of Mexico']
+    for start in range(0, size, batch_size):
+        collection.insert_many([
+            {
+                'report_id': f"CR-{start + i:07d}",
+                'timestamp': now - timedelta(minutes=randint(0, 60 * 24 * 60)),
+                'location': choice(locations),
+                'severity': choice(['low', 'medium', 'high']),
+                'status': choice(['pending', 'investigating', 'resolved']),
+                'reporter_type': choice(['citizen', 'tourist', 'volunteer', 'student']),
+                'pollution_type': choice(['plastic_bottles', 'plastic_bags', 'fishing_gear', 'microplastics', 'mixed_waste'])
+            }
+            for i in range(min(batch_size, size - start))
+        ], ordered=False)
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--database', default='gppnn_bench')
+    args = parser.parse_args()
+
+    collection = mongodb.client[args.database]['pollution_reports']
+    collection.create_index('timestamp')
+    print(f"{'reports':>10} {'legacy (s)':>12} {'$facet (s)':>12} {'speedup':>9}")
+    for size in args.sizes:
+        seed(collection, size)
+        legacy = best_of(lambda: legacy_citizen_report_analytics(collection), args.repeat)
+        facet = best_of(lambda: mongodb.compute_citizen_report_analytics(collection), args.repeat)
+        print(f"{size:>10} {legacy:>12.3f} {facet:>12.3f} {legacy / facet:>8.1f}x")
+    mongodb.client.drop_database(args.database)
+
+
+if __name__ == '__main__':
+    main()
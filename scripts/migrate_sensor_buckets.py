@@ -0,0 +1,80 @@
+"""Migrate per-reading sensor documents into hourly sensor_buckets documents.
+
+Run it after switching SENSOR_STORAGE_MODE to ``dual`` and restarting the
+app. New readings are then bucketed on ingest, and this script backfills
+every reading stored before ``--until`` (default: now). The cutoff uses the
+ObjectId creation time, so readings written after the restart are not
+bucketed twice. A ``--until`` without a UTC offset is read as UTC.
+
+    python scripts/migrate_sensor_buckets.py --until 2025-06-01T12:00:00+00:00
+    python scripts/migrate_sensor_buckets.py --resume-after 665f1c...  # continue an interrupted run
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+from bson import ObjectId
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import mongodb, sensor_bucket_updates  # noqa: E402
+
+
+def utc_datetime(value):
+    """Parse an ISO 8601 time as an aware datetime, treating a missing offset as UTC"""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--until', type=utc_datetime, default=None,
+                        help='only migrate readings stored before this time, UTC unless an offset is given (default: now)')
+    parser.add_argument('--resume-after', type=ObjectId, default=None,
+                        help='skip readings up to and including this _id')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--rebuild', action='store_true',
+                        help='drop sensor_buckets before migrating')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='count readings and bucket writes without writing')
+    args = parser.parse_args()
+
+    if args.rebuild and not args.dry_run:
+        mongodb.sensor_buckets.drop()
+    mongodb.ensure_indexes()
+
+    # ObjectId.from_datetime reads naive datetimes as UTC, so only pass aware ones
+    id_range = {'$lt': ObjectId.from_datetime(args.until or datetime.now(timezone.utc))}
+    if args.resume_after:
+        id_range['$gt'] = args.resume_after
+    cursor = mongodb.sensors.find({'_id': id_range}).sort('_id', 1).batch_size(args.batch_size)
+
+    started = time.perf_counter()
+    readings = buckets = 0
+    batch = []
+
+    def flush():
+        nonlocal buckets
+        operations = sensor_bucket_updates(batch)
+        if operations and not args.dry_run:
+            mongodb.sensor_buckets.bulk_write(operations, ordered=False)
+        buckets += len(operations)
+        print(f"{readings:>10} readings  {buckets:>8} bucket writes  last _id {batch[-1]['_id']}")
+        batch.clear()
+
+    for reading in cursor:
+        batch.append(reading)
+        readings += 1
+        if len(batch) >= args.batch_size:
+            flush()
+    if batch:
+        flush()
+    print(f"Migrated {readings} readings in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+from functools import cached_property
+from flask import g, has_app_context
+from aws_services import aws_services
+from models import mongodb
+from geo import cluster_hotspots
+
+# AquaPulse - Request-scoped dashboard snapshot
+
+class DashboardSnapshot:
+    """One consistent view of dashboard data for the lifetime of a request.
+
+    Recent sensors, cleanup data, statistics and predictions are each loaded
+    at most once, on first access. Hotspots and regional insights are
+    derived in memory from the sensor load.
+    """
+
+    @cached_property
+    def sensors(self):
+        return aws_services.get_iot_sensor_data()
+
+    @cached_property
+    def cleanup(self):
+        return aws_services.get_cleanup_coordination()
+
+    @cached_property
+    def statistics(self):
+        return mongodb.get_pollution_statistics()
+
+    @cached_property
+    def predictions(self):
+        return aws_services.get_prediction_data()
+
+    @cached_property
+    def region_levels(self):
+        """Pollution levels grouped by sensor location"""
+        region_data = {}
+        for sensor in self.sensors:
+            location = sensor.get('location', 'Unknown')
+            region_data.setdefault(location, []).append(sensor.get('pollution_level', 5.0))
+        return region_data
+
+    def pollution_trends(self):
+        """Categorize regions as increasing, stable or improving by average level"""
+        trends = {'increasing_regions': [], 'stable_regions': [], 'improving_regions': []}
+        for region, levels in self.region_levels.items():
+            if levels:
+                avg_level = sum(levels) / len(levels)
+                if avg_level > 7.0:
+                    trends['increasing_regions'].append(region)
+                elif avg_level < 4.0:
+                    trends['improving_regions'].append(region)
+                else:
+                    trends['stable_regions'].append(region)
+        return trends
+
+    def region_hotspots(self):
+        """Peak pollution per region, highest first"""
+        hotspots = []
+        for region, levels in self.region_levels.items():
+            if levels:
+                max_level = max(levels)
+                if max_level > 8.0:
+                    priority = 'critical'
+                elif max_level > 6.0:
+                    priority = 'high'
+                else:
+                    priority = 'medium'
+                hotspots.append({
+                    'location': region,
+                    'pollution_level': round(max_level, 1),
+                    'priority': priority
+                })
+        hotspots.sort(key=lambda x: x['pollution_level'], reverse=True)
+        return hotspots
+
+    def hotspots(self, threshold=6):
+        """Individual sensors above ``threshold`` in hotspot detection format"""
+        return [hotspot_entry(sensor) for sensor in self.sensors if sensor['pollution_level'] > threshold]
+
+    def hotspot_clusters(self, threshold=6):
+        """Density clusters of nearby sensors above ``threshold``"""
+        return cluster_hotspots([sensor for sensor in self.sensors if sensor['pollution_level'] > threshold])
+
+
+def hotspot_entry(sensor):
+    """A sensor reading in hotspot detection format"""
+    hotspot = {
+        'id': sensor['id'],
+        'location': sensor['location'],
+        'coordinates': {'lat': sensor['lat'], 'lng': sensor['lng']},
+        'geohash': sensor.get('geohash'),
+        'pollution_level': sensor['pollution_level'],
+        'microplastics': sensor.get('microplastics'),
+        'status': sensor.get('status'),
+        'priority': 'high' if sensor['pollution_level'] > 8 else 'medium',
+        'detected_at': sensor.get('timestamp'),
+        'cleanup_units_dispatched': 2 if sensor['pollution_level'] > 8 else 1
+    }
+    if 'distance_km' in sensor:
+        hotspot['distance_km'] = round(sensor['distance_km'], 2)
+    return hotspot
+
+
+def get_dashboard_snapshot():
+    """Return the snapshot for the current request, creating it on first use"""
+    if not has_app_context():
+        return DashboardSnapshot()
+    if 'dashboard_snapshot' not in g:
+        g.dashboard_snapshot = DashboardSnapshot()
+    return g.dashboard_snapshot
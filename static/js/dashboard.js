@@ -59,6 +59,12 @@ class AquaPulseDashboard {
 
             this.updatePredictionChart(predictionData);
             this.updateLastUpdateTime();
+
+            // The page renders with a placeholder while Bedrock runs in the background
+            const analysisElement = document.getElementById('ai-analysis');
+            if (analysisElement && analysisElement.dataset.jobId) {
+                this.pollAIAnalysisJob(analysisElement.dataset.jobId);
+            }
         } catch (error) {
             console.error('Error loading initial data:', error);
         }
@@ -204,26 +210,50 @@ class AquaPulseDashboard {
 
     async updateAIAnalysis() {
         try {
-            const response = await fetch('/api/ai-analysis');
+            const response = await fetch('/api/ai-analysis?async=1');
             const data = await response.json();
-            
-            const analysisElement = document.getElementById('ai-analysis');
-            if (analysisElement) {
-                // Replace any old terminology in the AI response for display
-                let html = data.html || data.analysis || '';
-                html = html.replace(/Pollution Levels/g, 'Algae Bloom Levels')
-                           .replace(/Microplastics Concentration/g, 'Microalgae Concentration')
-                           .replace(/particles/g, 'cells/L')
-                           .replace(/pollution level/g, 'algae bloom level')
-                           .replace(/Pollution/g, 'Algae Bloom')
-                           .replace(/pollution/g, 'algae bloom');
-                analysisElement.innerHTML = html;
+
+            if (data.job_id) {
+                this.pollAIAnalysisJob(data.job_id);
+            } else {
+                this.renderAIAnalysis(data.html || data.analysis || '');
             }
         } catch (error) {
             console.error('Error updating AI analysis:', error);
         }
     }
 
+    async pollAIAnalysisJob(jobId, attempt = 0) {
+        try {
+            const response = await fetch(`/api/ai-analysis/jobs/${jobId}`);
+            const data = await response.json();
+
+            if (data.status === 'pending' && attempt < 60) {
+                setTimeout(() => this.pollAIAnalysisJob(jobId, attempt + 1), 1500);
+                return;
+            }
+            if (data.html || data.analysis) {
+                this.renderAIAnalysis(data.html || data.analysis);
+            }
+        } catch (error) {
+            console.error('Error polling AI analysis job:', error);
+        }
+    }
+
+    renderAIAnalysis(html) {
+        const analysisElement = document.getElementById('ai-analysis');
+        if (analysisElement) {
+            // Replace any old terminology in the AI response for display
+            html = html.replace(/Pollution Levels/g, 'Algae Bloom Levels')
+                       .replace(/Microplastics Concentration/g, 'Microalgae Concentration')
+                       .replace(/particles/g, 'cells/L')
+                       .replace(/pollution level/g, 'algae bloom level')
+                       .replace(/Pollution/g, 'Algae Bloom')
+                       .replace(/pollution/g, 'algae bloom');
+            analysisElement.innerHTML = html;
+        }
+    }
+
     async playAnalysisAudio() {
         try {
             const analysisElement = document.getElementById('ai-analysis');
@@ -517,7 +547,10 @@ class AquaPulseDashboard {
             });
             
             const result = await response.json();
-            if (result.status) {
+            if (result.status === 'started') {
+                this.showToast(`Backup ${result.snapshot_id} started`, 'info');
+                this.pollBackup(result.backup_bucket, result.snapshot_id, result.job_id);
+            } else if (result.status) {
                 this.showToast(`Backup created: ${result.objects_backed_up} objects`, 'success');
             } else {
                 this.showToast('Failed to create backup', 'error');
@@ -528,6 +561,25 @@ class AquaPulseDashboard {
         }
     }
 
+    async pollBackup(backupBucket, snapshotId, jobId, attempt = 0) {
+        try {
+            const response = await fetch(`/api/backups/${backupBucket}/${snapshotId}?job_id=${jobId}`);
+            const data = await response.json();
+
+            if ((data.job_status === 'pending' || response.status === 404) && attempt < 720) {
+                setTimeout(() => this.pollBackup(backupBucket, snapshotId, jobId, attempt + 1), 5000);
+                return;
+            }
+            if (data.status === 'completed') {
+                this.showToast(`Backup created: ${data.objects_backed_up} objects`, 'success');
+            } else {
+                this.showToast(`Backup ${snapshotId} ${data.status || 'failed'}`, 'error');
+            }
+        } catch (error) {
+            console.error('Error polling backup:', error);
+        }
+    }
+
     async createLexBot() {
         try {
             const botName = `PollutionReportBot-${Date.now()}`;
@@ -724,8 +776,14 @@ class AquaPulseDashboard {
     // Pollution Command Center Functions
     async loadCitizenReports() {
         try {
-            const response = await fetch('/api/citizen-reports');
+            // The list shows the newest page; the stats come from the aggregate
+            // endpoint so they cover every report, not just the first page.
+            const [response, analyticsResponse] = await Promise.all([
+                fetch('/api/citizen-reports'),
+                fetch('/api/citizen-report-analytics')
+            ]);
             const reports = await response.json();
+            const analytics = analyticsResponse.ok ? await analyticsResponse.json() : {};
             const list = document.getElementById('citizen-reports-list');
             const stats = document.getElementById('citizen-reports-stats');
             if (reports.length > 0) {
@@ -749,13 +807,15 @@ class AquaPulseDashboard {
                         </div>
                     `;
                 }).join('');
-                // Statistics: count, high priority, N/A for average level
+                // Statistics: count, high priority and types across all reports
+                const highPriority = (analytics.severity_statistics || []).find(s => s._id === 'high');
+                const types = (analytics.pollution_type_statistics || []).map(t => t._id || 'N/A');
                 stats.innerHTML = `
                     <div class="card">
                         <div class="card-body">
-                            <p><strong>Total Reports:</strong> ${reports.length}</p>
-                            <p><strong>High Priority:</strong> ${reports.filter(r => r.severity === 'high').length}</p>
-                            <p><strong>Types:</strong> ${[...new Set(reports.map(r => r.pollution_type || 'N/A'))].join(', ')}</p>
+                            <p><strong>Total Reports:</strong> ${analytics.total_reports ?? 'N/A'}</p>
+                            <p><strong>High Priority:</strong> ${highPriority ? highPriority.count : 0}</p>
+                            <p><strong>Types:</strong> ${types.length ? types.join(', ') : 'N/A'}</p>
                         </div>
                     </div>
                 `;
@@ -2,6 +2,8 @@
 
 let map;
 let markers = [];
+let sensorRequest = null;
+let moveTimer = null;
 
 // Initialize the map
 function initMap() {
@@ -26,31 +28,91 @@ function initMap() {
         position: 'topright'
     }).addTo(map);
 
-    // Load sensor data and create markers
+    // Load sensor data for the visible area, and again whenever it changes
     loadSensorData();
+    map.on('moveend', () => {
+        clearTimeout(moveTimer);
+        moveTimer = setTimeout(loadSensorData, 250);
+    });
     
     console.log('✅ Map Initialized!');
 }
 
-// Load sensor data and create markers
+// Load sensors (or server-side clusters) for the current viewport and zoom
 function loadSensorData() {
-    fetch('/api/sensor-data')
+    // Drop the response for a viewport the user has already left
+    if (sensorRequest) sensorRequest.abort();
+    sensorRequest = new AbortController();
+
+    const bounds = map.getBounds();
+    const bbox = [bounds.getWest(), bounds.getSouth(), bounds.getEast(), bounds.getNorth()]
+        .map(value => value.toFixed(4)).join(',');
+    fetch(`/api/sensor-data?bbox=${bbox}&zoom=${map.getZoom()}`, { signal: sensorRequest.signal })
         .then(response => response.json())
         .then(data => {
-            console.log('📊 Loading sensor data:', data.length, 'sensors');
-            createSensorMarkers(data);
+            if (data.mode === 'clusters') {
+                console.log('📊 Loading sensor clusters:', data.clusters.length, 'cells for', data.total, 'sensors');
+                createClusterMarkers(data.clusters);
+            } else {
+                console.log('📊 Loading sensor data:', data.points.length, 'sensors');
+                createSensorMarkers(data.points);
+            }
         })
         .catch(error => {
+            if (error.name === 'AbortError') return;
             console.error('❌ Error loading sensor data:', error);
             // No fallback to demo data
         });
 }
 
+// Remove every marker from the map
+function clearMarkers() {
+    markers.forEach(marker => map.removeLayer(marker));
+    markers = [];
+}
+
+// Create one marker per aggregated cell; clicking zooms into the cell
+function createClusterMarkers(clusters) {
+    clearMarkers();
+
+    clusters.forEach(cluster => {
+        const color = getPollutionColor(cluster.max_level);
+        const size = Math.max(20, Math.min(48, 14 + Math.log2(cluster.count) * 5));
+        const icon = L.divIcon({
+            className: 'sensor-cluster',
+            html: `
+            <div title="Mean level: ${cluster.mean_level} | Max level: ${cluster.max_level}" style="
+                width: ${size}px;
+                height: ${size}px;
+                line-height: ${size}px;
+                background: ${color};
+                opacity: 0.85;
+                border-radius: 50%;
+                border: 2px solid white;
+                box-shadow: 0 2px 8px rgba(0,0,0,0.3);
+                color: white;
+                font-size: 11px;
+                font-weight: bold;
+                text-align: center;
+            ">${cluster.count}</div>
+            `,
+            iconSize: [size, size],
+            iconAnchor: [size / 2, size / 2]
+        });
+        const marker = L.marker([cluster.lat, cluster.lng], { icon: icon });
+        const [west, south, east, north] = cluster.bounds;
+        marker.on('click', () => map.fitBounds([[south, west], [north, east]]));
+        markers.push(marker);
+        marker.addTo(map);
+    });
+
+    console.log(`✅ Created ${markers.length} cluster markers`);
+}
+
 // Create sensor markers
 function createSensorMarkers(sensorData) {
     // Clear existing markers
-    markers.forEach(marker => map.removeLayer(marker));
-    markers = [];
+    clearMarkers();
     
     sensorData.forEach((sensor, index) => {
         const marker = createMarker(sensor, index);
@@ -183,8 +245,7 @@ function refreshData() {
 // Cleanup function
 function cleanupMap() {
     // Clear markers
-    markers.forEach(marker => map.removeLayer(marker));
-    markers = [];
+    clearMarkers();
 }
 
 // Initialize map when DOM is loaded
@@ -0,0 +1,89 @@
+import math
+import re
+from datetime import timedelta, timezone
+
+# AquaPulse - Windowing and downsampling helpers for sensor history
+
+RESOLUTION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+# Window sizes offered when the resolution is picked automatically
+NICE_RESOLUTIONS = (60, 300, 900, 1800, 3600, 3 * 3600, 6 * 3600, 12 * 3600, 86400, 7 * 86400)
+
+PERCENTILES = (50, 90, 95)
+
+
+def naive_utc(moment):
+    """``moment`` as a naive UTC datetime, the form readings are stored and compared in"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def parse_resolution(value):
+    """Window length in seconds from ``'90'``, ``'15m'``, ``'1h'``, ``'1d'`` or ``'1w'``"""
+    match = re.fullmatch(r'\s*(\d+)\s*([smhdw]?)\s*', value or '')
+    if not match or int(match.group(1)) <= 0:
+        raise ValueError(f"Invalid resolution: {value}")
+    return int(match.group(1)) * RESOLUTION_UNITS[match.group(2) or 's']
+
+
+def auto_resolution(start, end, target_windows):
+    """Smallest nice window length that covers ``start``-``end`` in at most ``target_windows`` windows"""
+    span = max(1, (end - start).total_seconds())
+    for seconds in NICE_RESOLUTIONS:
+        if span / seconds <= target_windows:
+            return seconds
+    return int(math.ceil(span / target_windows / 86400)) * 86400
+
+
+def window_start(start, index, resolution):
+    """Start time of window ``index`` counted from ``start``"""
+    return start + timedelta(seconds=index * resolution)
+
+
+def percentile(sorted_values, p):
+    """Linear-interpolated ``p``th percentile of already sorted values"""
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * p / 100
+    low = math.floor(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def lttb(points, threshold):
+    """Largest-Triangle-Three-Buckets downsampling of ``[(x, y, ...), ...]`` sorted by x.
+
+    Keeps the first and last points and, from each of ``threshold - 2`` equal
+    buckets in between, the point that forms the largest triangle with the
+    previously kept point and the next bucket's average. This preserves the
+    visual peaks and troughs of the series.
+    """
+    if threshold >= len(points) or threshold < 3:
+        return list(points)
+    sampled = [points[0]]
+    every = (len(points) - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        next_start = int(math.floor((i + 1) * every)) + 1
+        next_end = min(int(math.floor((i + 2) * every)) + 1, len(points))
+        next_bucket = points[next_start:next_end] or [points[-1]]
+        avg_x = sum(p[0] for p in next_bucket) / len(next_bucket)
+        avg_y = sum(p[1] for p in next_bucket) / len(next_bucket)
+
+        start = int(math.floor(i * every)) + 1
+        end = int(math.floor((i + 1) * every)) + 1
+        ax, ay = points[a][0], points[a][1]
+        best_area = -1
+        best = start
+        for j in range(start, end):
+            x, y = points[j][0], points[j][1]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                best = j
+        sampled.append(points[best])
+        a = best
+    sampled.append(points[-1])
+    return sampled